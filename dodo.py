@@ -1,27 +1,42 @@
+import io
 import os
-import re
 import sys
+import base64
+import subprocess
 import json
-import fileinput
+import hashlib
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import wraps
+from inspect import unwrap
 from mimetypes import guess_type
 from operator import itemgetter
 from time import mktime
 
 from email import generator  # Generator
-from email import encoders  # encode_base64
 from email import utils  # formatdate
-from email.mime.audio import MIMEAudio
-from email.mime.base import MIMEBase
-from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 from doit import get_var
-from lxml import etree
-from pandas import read_csv
-from slugify import slugify
+from pandas import DataFrame, isna
+
+from lib.ages import validate_age_ratings
+from lib.artefacts import ArtefactCache
+from lib.book import read_books
+from lib.covers import COVER_URL, CoverDownloader
+from lib.duplicates import find_clusters, read_issue
+from lib.files import find_file, get_name, get_temp_file, list_files, open_file, replace_file, strip_suffix, write_file
+from lib.isbn import parse as parse_isbn
+from lib.issue import load_issue, slug
+from lib.knv import dump_csv_files, load_csv_files, read_csv_files
+from lib.optimize import SizeOptimizer, extract_pages, parse_size
+from lib.scribus import Worker, WorkerPool, export_images, export_pdf
+from lib.preflight import Preflight
+from lib.profiler import Profiler
+from lib.sla import get_images, get_sections, hash_section, load_tree, read_index
+from lib.sla import parse as parse_sla
 
 
 ###
@@ -39,30 +54,92 @@ DOIT_CONFIG = {
     ],
 }
 
-config = {'issue': get_var('issue', '2021_02')}
-issue = config['issue']
+config = {
+    'issue': get_var('issue', '2021_02'),
 
-# Season
-season = 'spring' if issue[-2:] == '01' else 'autumn'
-season_de = 'Frühjahr' if season == 'spring' else 'Herbst'
+    # Build PDF section by section (re-rendering changed sections only)
+    'sections': get_var('sections', '0') == '1',
+
+    # Number of Scribus workers running in parallel
+    'workers': int(get_var('workers', str(min(4, os.cpu_count() or 1)))),
+
+    # Minimum resolution of placed images
+    'min_dpi': int(get_var('min_dpi', '150')),
+
+    # Cache for Scribus & Ghostscript outputs (may be shared between machines)
+    'artefacts': get_var('artefacts', '.cache/artefacts'),
+
+    # Cover source (with `{isbn}` placeholder) & number of simultaneous downloads
+    'cover_url': get_var('cover_url', COVER_URL),
+    'connections': int(get_var('connections', '8')),
+
+    # Retry failed cover downloads only (see `ISSUE/meta/failures.json`)
+    'resume': get_var('resume', '0') == '1',
+
+    # Target sizes of optimized documents, eg `sizes=10MB,50MB` (replacing fixed resolutions)
+    'sizes': get_var('sizes', ''),
+
+    # Resolution (or size) of optimized document used for publisher excerpts (defaults to final document)
+    'excerpts': get_var('excerpts', ''),
+
+    # Profile Python actions, writing pstats & collapsed stacks to `ISSUE/meta/profiles`
+    'profile': get_var('profile', '0') == '1',
+
+    # .. also reporting top allocation sites (slowing down actions considerably)
+    'tracemalloc': get_var('tracemalloc', '0') == '1',
+
+    # Fixed build time (as UNIX timestamp), making outputs reproducible
+    'epoch': get_var('epoch', os.environ.get('SOURCE_DATE_EPOCH')),
+}
+
+# Issues to be processed, being either ..
+# (1) .. a single issue, eg `issue=2021_02`
+# (2) .. several issues, eg `issue=2021_01,2021_02`
+# (3) .. all issues with source data, eg `issue=all`
+issues = config['issue'].split(',')
+
+if config['issue'] == 'all':
+    issues = [name for name in sorted(os.listdir('issues')) if os.path.isdir('issues/' + name + '/src')]
 
 # Directories
 # (1) Base
 assets = 'assets'
 
-# (2) Per-issue
-home_dir = 'issues/' + issue
-meta_dir = home_dir + '/meta'
-conf_dir = home_dir + '/config'
-src_dir = home_dir + '/src'
-dist_dir = home_dir + '/dist'
+
+def use_issue(name: str):
+    # Point per-issue settings & directories to given issue
+    global issue, season, season_de, home_dir, meta_dir, conf_dir, src_dir, dist_dir
+
+    issue = name
+
+    # Season
+    season = 'spring' if issue[-2:] == '01' else 'autumn'
+    season_de = 'Frühjahr' if season == 'spring' else 'Herbst'
+
+    # (2) Per-issue
+    home_dir = 'issues/' + issue
+    meta_dir = home_dir + '/meta'
+    conf_dir = home_dir + '/config'
+    src_dir = home_dir + '/src'
+    dist_dir = home_dir + '/dist'
+
+
+use_issue(issues[0])
 
 # Time
-now = datetime.now()
+now = datetime.fromtimestamp(int(config['epoch'])) if config['epoch'] else datetime.now()
+
+# Pass fixed build time on to Scribus & Ghostscript
+if config['epoch']:
+    os.environ['SOURCE_DATE_EPOCH'] = config['epoch']
+
 year = str(now.year)
 next_year = str(now.year + 1)
 last_year = str(now.year - 1)
 
+# In-memory cache for parsed files
+cache = {}
+
 # Headings
 headings = {
     'toddler': 'Für die Kleinsten',
@@ -83,6 +160,28 @@ headings = {
     'kalender': 'Kalender für ' + next_year,
 }
 
+# Document structure
+# (= category partials being imported after their designated page number,
+# starting from the end so that page numbers stay valid)
+structure = [
+    ['kalender', 20],
+    ['weihnachten', 19],
+    ['ostern', 18],
+    ['hoerbuch', 17],
+    ['besonderes', 16],
+    ['kreatives', 15],
+    ['sachbuch', 14],
+    ['comic', 13],
+    ['ab14', 12],
+    ['ab12', 11],
+    ['ab10', 10],
+    ['ab8', 9],
+    ['ab6', 8],
+    ['vorlesebuch', 7],
+    ['bilderbuch', 6],
+    ['toddler', 5],
+]
+
 #
 # CONFIG (END)
 ###
@@ -99,7 +198,9 @@ def task_phase_one():
     return {
         'actions': None,
         'task_dep': [
+            'ingest_csv',
             'fetch_api',
+            'fetch_covers',
             'check_data',
         ]
     }
@@ -108,6 +209,9 @@ def task_phase_one():
 def task_phase_two():
     """
     'Phase 2' tasks: prod-stage
+
+    Every task writes its own targets only (never touching its inputs),
+    so this may be run in parallel, eg `doit -n $(nproc) phase_two`
     """
     return {
         'actions': None,
@@ -130,7 +234,9 @@ def task_phase_three():
         'task_dep': [
             'build_pdf',
             'optimize_pdf',
+            'extract_excerpts',
             'finish_issue',
+            'export_data',
         ]
     }
 
@@ -143,14 +249,32 @@ def task_phase_three():
 # TASKS (START)
 #
 
+def task_ingest_csv():
+    """
+    Parses KNV exports into one typed table
+
+    `ISSUE/src/csv/*.csv` >> `ISSUE/dist/books.pickle`
+    """
+    def ingest_csv(csv_files, targets):
+        # Parse exports (in order of categories, unlike `dependencies`) & update cache
+        dump_csv_files(read_csv_files(csv_files), csv_files, targets[0])
+
+
+    return {
+        'file_dep': get_files('csv', 'src'),
+        'actions': [(ingest_csv, [get_files('csv', 'src')])],
+        'targets': [get_template('books')],
+    }
+
+
 def task_fetch_api():
     """
-    Fetches bibliographic data & book covers
+    Fetches bibliographic data (covers being downloaded by `fetch_covers`)
 
     ISSUE/src/csv/example.csv` >> `ISSUE/src/json/example.json`
     """
     for csv_file in get_files('csv', 'src'):
-        category = os.path.basename(csv_file)[:-4]
+        category = get_name(csv_file)
         json_file = src_dir + '/json/' + category + '.json'
 
         yield {
@@ -161,94 +285,39 @@ def task_fetch_api():
         }
 
 
+def task_fetch_covers():
+    """
+    Downloads book covers, many at a time (skipping unchanged ones)
+
+    With `resume=1`, only failed (or interrupted) downloads are retried
+
+    `ISSUE/src/json/*.json` >> `ISSUE/dist/images/*.jpg`
+    `ISSUE/src/json/*.json` >> `ISSUE/meta/covers.json`
+    """
+    return {
+        'task_dep': ['fetch_api'],
+        'file_dep': get_files('json', 'src'),
+        'actions': [download_covers],
+        'targets': [meta_dir + '/covers.json'],
+    }
+
+
 def task_check_data():
     """
-    Finds all duplicate ISBNs & detects improper age ratings
+    Finds all duplicate ISBNs & editions (also across earlier issues) & detects improper age ratings
+
+    Note: Age ratings edited by hand are kept, only new ones are being added
 
     >> `ISSUE/config/duplicates.json`
     >> `ISSUE/meta/duplicates.txt`
+    >> `ISSUE/meta/duplicates.json`
     >> `ISSUE/config/age-ratings.json`
     >> `ISSUE/meta/age-ratings.txt`
+    >> `ISSUE/meta/age-ratings.json`
     """
-    def find_duplicates(dependencies, targets):
-        duplicates = {}
-
-        # Extract all categories an ISBN appears in
-        for json_file in dependencies:
-            # Get category (= filename w/o extension)
-            category = os.path.basename(json_file)[:-5]
-
-            for data in load_json(json_file):
-                isbn = data['ISBN']
-
-                if isbn not in duplicates:
-                    duplicates[isbn] = set()
-
-                duplicates[isbn].add(category)
-
-        # Setup ISBN allowlist & report
-        isbns = {}
-        report = []
-
-        # Go through findings ..
-        for isbn, categories in duplicates.items():
-            # .. checking if each ISBN has more than one category, and if so ..
-            if len(categories) > 1:
-                # .. report duplicate for given categories
-                # (1) Remove duplicate categories
-                categories = list(dict.fromkeys(categories))
-
-                # (2) Report duplicate ISBN & categories in question
-                report.append('%s: %s' % (isbn, ' & '.join(categories)))
-
-                # (3) Store duplicate categories per ISBN
-                isbns[isbn] = categories
-
-        # Store duplicate ISBNs
-        dump_json(isbns, targets[0])
-
-        # Provide message in case report is empty
-        if not report:
-            report = ['No duplicates found!']
-
-        # Write report to file
-        with open(targets[1], 'w') as file:
-            file.writelines(line + '\n' for line in report)
-
-
-    def check_age_ratings(dependencies, targets):
-        src = {}
-
-        for json_file in dependencies:
-            category = os.path.basename(json_file)[:-5]
-
-            for data in load_json(json_file):
-                age_rating = data['Altersempfehlung']
-
-                if 'angabe' in age_rating or 'bis' in age_rating:
-                    src[data['ISBN']] = age_rating
-
-        # Store age ratings data in JSON file
-        dump_json(src, targets[2])
-
-        age_ratings = []
-
-        for isbn, age_rating in src.items():
-            age_ratings.append('%s: %s' % (isbn, age_rating))
-
-        if not age_ratings:
-            # .. otherwise there isn't anything to report back, really
-            age_ratings = ['No improper age ratings found!']
-
-        # Save improper age ratings
-        with open(targets[3], 'w') as file:
-            # Write age ratings report to file
-            file.writelines(age_rating + '\n' for age_rating in age_ratings)
-
-
     return {
-        'task_dep': ['fetch_api'],
-        'file_dep': get_files('json', 'src'),
+        'task_dep': ['fetch_api', 'ingest_csv'],
+        'file_dep': get_files('json', 'src') + get_archive_files(),
         'actions': [
             find_duplicates,
             check_age_ratings,
@@ -258,6 +327,8 @@ def task_check_data():
             meta_dir + '/duplicates.txt',
             get_template('age-ratings'),
             meta_dir + '/age-ratings.txt',
+            meta_dir + '/age-ratings.json',
+            meta_dir + '/duplicates.json',
         ],
     }
 
@@ -269,7 +340,7 @@ def task_process_data():
     ISSUE/src/json/example.json` >> `ISSUE/dist/json/example.json`
     """
     for json_file in get_files('json', 'src'):
-        category = os.path.basename(json_file)[:-5]
+        category = get_name(json_file)
 
         yield {
             'name': json_file,
@@ -296,8 +367,8 @@ def task_create_template():
 
     # Build command
     create_template = [
-        'scribus -g -ns -py',             # Scribus command
-        'scripts/python/delete_page.py',  # Scribus script
+        sys.executable,                   # Python executable
+        'scripts/python/delete_page.py',  # Scribus client script
         '%(targets)s',                    # Base template
         '--page ' + str(page_number),     # Page number
     ]
@@ -321,15 +392,17 @@ def task_generate_partials():
     b) `ISSUE/src/templates/dataList.sla` or
     c) `assets/templates/dataList.sla` as fallback
 
-    >> `ISSUE/dist/templates/example.sla`
+    >> `ISSUE/dist/templates/partials/generated/example.sla`
+    >> `ISSUE/dist/templates/partials/example.sla`
     """
     for csv_file in get_files('csv', 'dist'):
         # Stripping path & extension
-        category = os.path.basename(csv_file)[:-4]
+        category = get_name(csv_file)
 
         # Build target directory & filename
-        partials_dir = dist_dir + '/templates/partials'
-        partial_file = partials_dir + '/' + category + '.sla'
+        generated_dir = dist_dir + '/templates/partials/generated'
+        generated_file = generated_dir + '/' + category + '.sla'
+        partial_file = get_partial(category)
 
         # Add template extension
         template_name = category + '.sla'
@@ -358,21 +431,21 @@ def task_generate_partials():
             # See https://github.com/berteh/ScribusGenerator
             '.env/bin/python',
             'vendor/berteh/scribusgenerator/ScribusGeneratorCLI.py',
-            '--single',            # Single file output
-            '-c ' + csv_file,      # CSV file
-            '-o ' + partials_dir,  # Output directory
-            '-n ' + category,      # Output filename
-            template_file,         # Template path
+            '--single',             # Single file output
+            '-c ' + csv_file,       # CSV file
+            '-o ' + generated_dir,  # Output directory
+            '-n ' + category,       # Output filename
+            template_file,          # Template path
         ]
 
         yield {
             'name': partial_file,
-            'file_dep': [csv_file],
+            'file_dep': [csv_file, template_file],
             'actions': [
                 ' '.join(generate_partials),
-                (replace, [partial_file, '%%CATEGORY%%', headings[category]]),
+                (substitute, [generated_file, partial_file, {'%%CATEGORY%%': headings[category]}]),
             ],
-            'targets': [partial_file],
+            'targets': [generated_file, partial_file],
         }
 
 
@@ -380,99 +453,75 @@ def task_import_partials():
     """
     Imports category partials into base template
 
-    `ISSUE/dist/templates/unprocessed.sla` +
-    `ISSUE/dist/templates/partials/*.sla` >> `ISSUE/dist/processed.sla`
-    """
-    # Document structure
-    structure = [
-        ['kalender', 20],
-        ['weihnachten', 19],
-        ['ostern', 18],
-        ['hoerbuch', 17],
-        ['besonderes', 16],
-        ['kreatives', 15],
-        ['sachbuch', 14],
-        ['comic', 13],
-        ['ab14', 12],
-        ['ab12', 11],
-        ['ab10', 10],
-        ['ab8', 9],
-        ['ab6', 8],
-        ['vorlesebuch', 7],
-        ['bilderbuch', 6],
-        ['toddler', 5],
-    ]
+    `ISSUE/dist/templates/base.sla` +
+    `ISSUE/dist/templates/partials/*.sla` >> `ISSUE/dist/templates/processed.sla`
+    """
+    processed_template = get_template('processed')
+
+    # Work on a copy, leaving base template untouched
+    temp_file = processed_template + '.tmp'
+
+    # Determine available category partials
+    categories = [get_name(csv_file) for csv_file in get_files('csv', 'dist')]
+
+    partials = []
+    actions = ['cp %s %s' % (get_template('base'), temp_file)]
 
     # Create import for each category partial after its designated page number
     for category, page_number in structure:
         # Define category partial
-        category_file = dist_dir + '/templates/partials/' + category + '.sla'
+        category_file = get_partial(category)
 
         # Build command
         import_partials = [
-            'scribus -g -ns -py',               # Scribus command
-            'scripts/python/import_partials.py',   # Scribus script
-            '%(dependencies)s',                 # Base template
+            sys.executable,                     # Python executable
+            'scripts/python/import_pages.py',   # Scribus client script
+            temp_file,                          # Base template
             category_file,                      # Import file
             '--page ' + str(page_number),       # Page number
             '--masterpage category_' + season,  # Masterpage
         ]
 
         # Remove cover page if corresponding category partial doesn't exist
-        if os.path.isfile(category_file) is False:
+        if category not in categories:
             import_partials = [
-                'scribus -g -ns -py',             # Scribus command
-                'scripts/python/delete_page.py',  # Scribus script
-                '%(dependencies)s',               # Base template
+                sys.executable,                   # Python executable
+                'scripts/python/delete_page.py',  # Scribus client script
+                temp_file,                        # Base template
                 '--page ' + str(page_number),     # Page number
             ]
 
-        yield {
-            'name': category_file,
-            'file_dep': [get_template('base')],
-            'actions': [' '.join(import_partials)],
-        }
+        else:
+            partials.append(category_file)
 
+        actions.append(' '.join(import_partials))
 
-def task_prepare_editing():
-    """
-    Prepares base template for manual editing
+    # Publish result once all imports are done
+    actions.append('mv %s %s' % (temp_file, processed_template))
 
-    a) replace variables
-    b) copy base template
+    return {
+        'file_dep': [get_template('base')] + partials,
+        'actions': actions,
+        'targets': [processed_template],
+    }
 
-    `ISSUE/dist/templates/base.sla` >> `ISSUE/dist/templates/edited.sla`
+
+def task_prepare_editing():
     """
-    edited_template = get_template('edited')
+    Prepares processed template for manual editing
 
-    # Replace spring template names with autumn ones
-    def apply_season(dependencies):
-        templates = [
-            'cover_spring',
-            'toc_spring',
-            'section_spring',
-            'category_spring',
-        ]
+    a) replace variables
+    b) copy processed template
 
-        # Base template features spring colors ..
-        if season == 'autumn':
-            # .. therefore, we have to change in case of autumn edition
-            for template in templates:
-                # .. achieved with a simple substitution
-                replace(dependencies[0],
-                    'MNAM="' + template,
-                    'MNAM="' + template.replace('spring', 'autumn')
-                )
+    Since the edited template is changed by hand, it's created only once (if missing)
+    & never being declared as target, so that later tasks don't depend on this one
 
+    `ISSUE/dist/templates/processed.sla` >> `ISSUE/dist/templates/edited.sla`
+    """
     return {
-        'file_dep': [get_template('base')],
-        'actions': [
-            (apply_season),
-            (replace, ['%(dependencies)s', '%%SEASON%%', season_de]),
-            (replace, ['%(dependencies)s', '%%YEAR%%', year]),
-            (replace, ['%(dependencies)s', '%%NEXT_YEAR%%', next_year]),
-            'cp %(dependencies)s ' + edited_template,
-        ],
+        'task_dep': ['import_partials'],
+        'actions': [(prepare_template, [get_template('processed'), get_template('edited')])],
+        'uptodate': [os.path.isfile(get_template('edited'))],
     }
 
 
@@ -480,31 +529,82 @@ def task_build_pdf():
     """
     Builds document from base template
 
-    `ISSUE/dist/templates/edited.sla` >> `ISSUE/dist/documents/final.pdf`
+    With `sections=1`, each section is rendered on its own & cached,
+    so that only changed sections are re-rendered
+
+    `ISSUE/dist/templates/edited.sla` >> `ISSUE/dist/documents/pdf/final.pdf`
     """
     # Build command
     build_pdf = [
-        'scribus -g -py',               # Scribus command
-        'scripts/python/build_pdf.py',  # Scribus script
+        '%(python)s',                   # Python executable (machine-independent, see `run_cached`)
+        'scripts/python/build_pdf.py',  # Scribus client script
         '--input %(dependencies)s',     # Input file
         '--output %(targets)s',         # Output file
     ]
 
     return {
+        'task_dep': ['preflight'],
         'file_dep': [get_template('edited')],
-        'actions': [' '.join(build_pdf)],
+        'actions': [build_sections if config['sections'] else (build_document, [' '.join(build_pdf)])],
         'targets': [get_template('document')],
     }
 
 
+def task_preflight():
+    """
+    Checks all images placed in the edited template (existence, resolution & color space)
+
+    Fails if images are missing, so that broken assets are caught before rendering
+
+    `ISSUE/dist/templates/edited.sla` >> `ISSUE/meta/preflight.txt`
+    `ISSUE/dist/templates/edited.sla` >> `ISSUE/meta/preflight.json`
+    """
+    return {
+        'file_dep': [get_template('edited')],
+        'actions': [check_images],
+        'targets': [
+            meta_dir + '/preflight.txt',
+            meta_dir + '/preflight.json',
+        ],
+        # Images may change without template changing
+        'uptodate': [False],
+    }
+
+
+def task_preview():
+    """
+    Generates low-resolution page previews for quick browsing
+
+    Only pages whose contents changed are rendered again
+
+    `ISSUE/dist/templates/edited.sla` >> `ISSUE/dist/documents/preview/index.html`
+    """
+    return {
+        'file_dep': [get_template('edited')],
+        'actions': [build_preview],
+        'targets': [dist_dir + '/documents/preview/index.html'],
+    }
+
+
 def task_optimize_pdf():
     """
     Optimizes document for smaller file size
 
+    With `sizes=10MB,50MB`, highest resolution staying under each size is used
+    (instead of fixed resolutions), see `ISSUE/meta/optimize.json`
+
     `ISSUE/dist/documents/pdf/bloated.pdf` >> `ISSUE/dist/optimized.pdf`
     """
-    # Season slug
-    season_slug = slug(season_de)
+    # Target sizes
+    if config['sizes']:
+        yield {
+            'name': [meta_dir + '/optimize.json'],
+            'file_dep': [get_template('document')],
+            'actions': [optimize_sizes],
+            'targets': [get_document(slug(size)) for size in config['sizes'].split(',')] + [meta_dir + '/optimize.json'],
+        }
+
+        return
 
     # Printing resolutions
     dots_per_inch = [
@@ -519,56 +619,51 @@ def task_optimize_pdf():
 
     for dpi in dots_per_inch:
         # Build output filepath
-        optimized_file = home_dir + '/' + str(now.year) + '-' + season_slug + '-buchempfehlungen_' + dpi + '.pdf'
-
-        # Build command
-        optimize_pdf = [
-            'gs',
-            '-dCompatibilityLevel=1.4',
-            '-dNOPAUSE',
-            '-dBATCH',
-            '-dQUIET',
-
-            # Performance
-            # See https://ghostscript.com/doc/current/Use.htm#Improving_performance
-            '-dNumRenderingThreads=8',               # Increase number of threads
-            '-dBandHeight=100',                      # Increase band size
-            '-dBufferSpace=1000000000',              # Reduce per-band overhead
-            '-dNOGC',                                # Disable garbage collector
-
-            # Font optimization
-            '-dSubsetFonts=true',
-            '-dCompressFonts=true',
-
-            # Image quality & colors
-            # Manually apply '-dPDFSETTINGS=XY' where XY ..
-            # /default
-            # /screen:    72dpi
-            # /ebook:    150dpi
-            # /printer:  300dpi
-            # /prepress: 300dpi
-            '-dMonoImageResolution=' + dpi,
-            '-dGrayImageResolution=' + dpi,
-            '-dColorImageResolution=' + dpi,
-            '-dDownsampleMonoImages=true',
-            '-dDownsampleGrayImages=true',
-            '-dDownsampleColorImages=true',
-            '-dConvertCMYKImagesToRGB=true',
-
-            # I/O
-            '-sDEVICE=pdfwrite',
-            '-sOutputFile=%(targets)s',
-            '-f %(dependencies)s',
-        ]
+        optimized_file = get_document(dpi)
 
         yield {
             'name': [optimized_file],
             'file_dep': [get_template('document')],
-            'actions': [' '.join(optimize_pdf)],
+            'actions': [(run_cached, [get_optimize_command(dpi), 'gs'])],
             'targets': [optimized_file],
         }
 
 
+def task_extract_excerpts():
+    """
+    Extracts cover & pages of each publisher's books from document (without re-rendering)
+
+    With `excerpts=DPI` (or size, eg `excerpts=10MB`), pages are taken from optimized document
+
+    `ISSUE/dist/documents/pdf/final.pdf` >> `ISSUE/dist/documents/excerpts/publisher.pdf`
+    `ISSUE/dist/documents/pdf/final.pdf` >> `ISSUE/dist/documents/excerpts/index.json`
+    """
+    return {
+        'file_dep': [get_document(slug(config['excerpts'])), get_template('edited')],
+        'actions': [build_excerpts],
+        'targets': [dist_dir + '/documents/excerpts/index.json'],
+    }
+
+
+def task_reconcile_data():
+    """
+    Reports books missing (or extra) at each stage, per category
+
+    `src/csv` > `src/json` > `dist/json` > `ISSUE/dist/templates/edited.sla`
+
+    >> `ISSUE/meta/reconciliation.txt`
+    >> `ISSUE/meta/reconciliation.json`
+    """
+    return {
+        'file_dep': get_files('csv', 'src') + get_files('json', 'src') + get_files('json', 'dist') + [get_template('edited')],
+        'actions': [reconcile_books],
+        'targets': [
+            meta_dir + '/reconciliation.txt',
+            meta_dir + '/reconciliation.json',
+        ],
+    }
+
+
 def task_finish_issue():
     """
     Parses the redacted template for use in post-production
@@ -576,164 +671,113 @@ def task_finish_issue():
     >> `ISSUE/dist/documents/mails/publisher.eml`
     >> `ISSUE/meta/summary.txt`
     >> `ISSUE/config/data.json`
+    >> `ISSUE/meta/statistics.json`
     """
-    def compose_mails(targets):
-        # Extract books from template
-        books = extract_books(get_template('edited'))
-
-        # Grab publishers
-        publishers = {book['Verlag'] for book in books}
-
-        # Build text block for each of them
-        for publisher in sorted(publishers, key=str.casefold):
-            text_blocks = []
-
-            for book in books:
-                if book['Verlag'] == publisher:
-                    text_blocks.append({
-                        'author': book['AutorIn'],
-                        'title': book['Titel'],
-                        'pages': book['Seitenzahl'],
-                    })
-
-            # Sort by (1) page number, (2) author & (3) book title
-            text_blocks = [block['author'] + ' - "' + block['title'] + '" auf Seite ' + str(block['pages']) for block in sorted(text_blocks, key=itemgetter('pages', 'author', 'title'))]
-
-            # Write summary
-            with open(targets[0], 'a') as file:
-                file.write(publisher + ':\n')
-                file.writelines([line + '\n' for line in text_blocks])
-                file.write('\n')
-
-            # Build output filepath
-            mail_file = dist_dir + '/documents/mails/' + slug(publisher) + '.eml'
-
-            # Load text parts
-            text_block = '<br>'.join(text_blocks)
-
-            # (1) Grab season text
-            with open(assets + '/mails/' + season + '.html', 'r') as file:
-                season_text = ''.join(file.readlines())
-
-            # (2) Replace year placeholders
-            for placeholder, replacement in {
-                '%%LAST_YEAR%%': last_year,
-                '%%THIS_YEAR%%': year,
-                '%%NEXT_YEAR%%': year + '/' + next_year[2:],
-            }.items():
-                season_text = season_text.replace(placeholder, replacement)
-
-            # (3) Grab email signature
-            with open(assets + '/mails/signature.html', 'r') as file:
-                signature = ''.join(file.readlines())
-
-            text = (
-                '<html><head></head><body>'
-                + season_text + '<p>' + text_block + '</p>' + signature +
-                '</body></html>'
-            )
-
-            # Create subject
-            subject = 'Empfehlungsliste ' + season_de + ' ' + year
+    return {
+        # 'file_dep': [get_template('edited')],
+        # Attach excerpts to mails (see `compose_mails`)
+        'task_dep': ['reconcile_data', 'extract_excerpts'],
+        'actions': [
+            compose_mails,
+            extract_data,
+            compile_statistics,
+        ],
+        'targets': [
+            meta_dir + '/summary.txt',
+            home_dir + '/data.json',
+            meta_dir + '/statistics.json',
+        ],
+    }
 
-            create_mail(
-                is_from='info@fundevogel.de',
-                subject=subject, text=text,
-                output_path=mail_file
-            )
 
+def task_export_data():
+    """
+    Exports books as newline-delimited JSON (one record per line)
 
-    def extract_data(targets):
-        # Parse Scribus template file
-        text_elements = etree.parse(get_template('edited')).getroot().findall('.//PAGEOBJECT/StoryText/ITEXT')
+    If exported before, only changed records are appended
+    (superseding earlier ones), removed books are marked as deleted
 
-        books = {}
+    >> `ISSUE/data.ndjson`
+    >> `ISSUE/meta/data.ndjson.json`
+    """
+    return {
+        'file_dep': [get_template('edited')] + get_files('json', 'dist'),
+        'actions': [export_records],
+        'targets': [
+            home_dir + '/data.ndjson',
+            meta_dir + '/data.ndjson.json',
+        ],
+    }
 
-        # Parsing JSON data files
-        for json_file in get_files('json', 'dist'):
-            # Buffer results for easier sorting later on
-            buffer = []
 
-            # Extract books from template
-            for json_data in load_json(json_file):
-                # Fix edge cases when author is undefined
-                # See 978-3-649-64031-8
-                if not json_data['AutorInnen']:
-                    json_data['AutorInnen'] = ''
+def task_stop_scribus():
+    """
+    Stops Scribus worker (if running)
 
-                # Go through all text elements
-                for element in text_elements:
-                    # Look for matching ISBN
-                    if json_data['ISBN'] in element.attrib['CH']:
-                        # Extract header
-                        # (1) Grab previous 'PAGEOBJECT' element
-                        page_object = element.getparent().getparent().getprevious()
+    Otherwise, it exits on its own after being idle for a while
+    """
+    return {
+        'actions': [
+            (lambda: Worker().stop()),
+            (lambda: WorkerPool(config['workers']).stop()),
+        ],
+        'uptodate': [False],
+    }
 
-                        # (2) Extract children
-                        header = []
 
-                        if len(page_object) > 0:
-                            for child in page_object[0]:
-                                if (child.tag == 'ITEXT'):
-                                    header.append(child.attrib['CH'])
+def task_watch_issue():
+    """
+    Watches current issue, re-running affected steps on save
 
-                        # (3) Fix edge cases where header comes AFTER body
-                        if not header:
-                            page_object = element.getparent().getparent().getnext()
+    `ISSUE/dist/templates/edited.sla` >> summary, mails & `ISSUE/data.json`
+    `ISSUE/src/json/*.json` >> duplicates & age ratings
+    `ISSUE/config/*.json` >> processed data
+    """
+    # Use tasks of current issue (even when processing several issues)
+    check_targets = unwrap(task_check_data)()['targets']
+    finish_targets = unwrap(task_finish_issue)()['targets']
 
-                            if len(page_object) > 0:
-                                for child in page_object[0]:
-                                    if (child.tag == 'ITEXT'):
-                                        header.append(child.attrib['CH'])
+    def check_duplicates():
+        find_duplicates(check_targets)
 
-                        # Extract text
-                        # (1) Grab parent element
-                        parent = element.getparent()
+    def check_ratings():
+        check_age_ratings(check_targets)
 
-                        # (2) Extract children
-                        body = []
+    def process_data():
+        for json_file in get_files('json', 'src'):
+            category = get_name(json_file)
 
-                        for child in parent:
-                            if (child.tag == 'ITEXT'):
-                                body.append(child.attrib['CH'])
+            subprocess.run(['php', 'scripts/php/pcbis.php', 'processing', issue, category], check=True)
 
-                        # Stop
-                        break
+    def update_summary():
+        compose_mails(finish_targets)
 
-                # Build book data
-                buffer.append({
-                    # (1) ISBN, sorting order & author(s)
-                    'isbn': json_data['ISBN'],
-                    'sort': json_data['Sortierung'],
-                    'author': json_data['AutorInnen'],
+    def update_data():
+        extract_data(finish_targets)
 
-                    # (2) Header
-                    'header': header,
+    def watch_issue():
+        # Import here, since watching files requires Linux
+        from lib.watch import Watcher
 
-                    # (3) Text body (excluding ISBN, age rating & retail price)
-                    'body': body[:-2],
-                })
+        # Warm up cache
+        load_sla(get_template('edited'))
 
-            # Determine heading
-            heading = headings[os.path.basename(json_file)[:-5]]
+        for json_file in get_files('json', 'src') + get_files('json', 'dist'):
+            load_books(json_file)
 
-            books[heading] = sorted(buffer, key=itemgetter('sort'))
+        print('Watching issue %s ..' % issue)
 
-        # Store results
-        dump_json(books, targets[1])
+        Watcher(rules=[
+            (get_template('edited'), [update_summary, update_data]),
+            (dist_dir + '/json/*.json', [update_summary, update_data]),
+            (src_dir + '/json/*.json', [check_duplicates, check_ratings]),
+            (conf_dir + '/*.json', [process_data]),
+        ]).run()
 
 
     return {
-        # 'file_dep': [get_template('edited')],
-        'actions': [
-            'rm -f %(targets)s',
-            compose_mails,
-            extract_data,
-        ],
-        'targets': [
-            meta_dir + '/summary.txt',
-            home_dir + '/data.json',
-        ],
+        'actions': [watch_issue],
+        'uptodate': [False],
     }
 
 #
@@ -741,10 +785,649 @@ def task_finish_issue():
 ###
 
 
+###
+# ACTIONS (START)
+#
+
+def find_duplicates(targets):
+    duplicates = {}
+    report = []
+
+    # Extract all categories an ISBN appears in
+    for json_file in get_files('json', 'src'):
+        # Get category (= filename w/o extension)
+        category = get_name(json_file)
+
+        for data in load_books(json_file):
+            isbn = parse_isbn(data['ISBN'])
+
+            # Report invalid ISBNs (eg typos)
+            if isbn is None:
+                report.append('%s: invalid ISBN (%s)' % (data['ISBN'], category))
+
+                continue
+
+            if isbn not in duplicates:
+                duplicates[isbn] = set()
+
+            duplicates[isbn].add(category)
+
+    # Setup ISBN allowlist
+    isbns = {}
+
+    # Go through findings ..
+    for isbn, categories in duplicates.items():
+        # .. checking if each ISBN has more than one category, and if so ..
+        if len(categories) > 1:
+            # .. report duplicate for given categories
+            # (1) Remove duplicate categories
+            categories = list(dict.fromkeys(categories))
+
+            # (2) Report duplicate ISBN & categories in question
+            report.append('%s: %s' % (isbn, ' & '.join(categories)))
+
+            # (3) Store duplicate categories per ISBN
+            isbns[str(isbn)] = categories
+
+    # Store duplicate ISBNs
+    dump_json(isbns, targets[0])
+
+    # Detect same works under different ISBNs (eg hardcover & audiobook),
+    # including those featured in earlier issues
+    books = read_issue(home_dir)
+
+    for issue_dir in get_archive():
+        books += read_issue(issue_dir)
+
+    clusters = [cluster for cluster in find_clusters(books) if any(book['Ausgabe'] == issue for book in cluster['books'])]
+
+    for cluster in clusters:
+        # Skip duplicate ISBNs (see above)
+        if len({book['ISBN'] for book in cluster['books']}) == 1 and all(book['Ausgabe'] == issue for book in cluster['books']):
+            continue
+
+        report.append('%s (%.2f): %s' % (
+            cluster['books'][0]['Titel'],
+            cluster['confidence'],
+            ' & '.join('%s (%s, %s)' % (book['ISBN'], book['Ausgabe'], book['Kategorie']) for book in cluster['books']),
+        ))
+
+    dump_json(clusters, targets[5])
+
+    # Provide message in case report is empty
+    if not report:
+        report = ['No duplicates found!']
+
+    # Write report to file
+    write_lines(report, targets[1])
+
+
+def download_covers(targets):
+    covers = {}
+
+    # Name cover after book title
+    for json_file in get_files('json', 'src'):
+        for data in load_books(json_file):
+            isbn = parse_isbn(data['ISBN'])
+
+            covers[data['ISBN']] = (
+                isbn.digits if isbn is not None else data['ISBN'],
+                dist_dir + '/images/' + slug(data['Titel']) + '.jpg',
+            )
+
+    downloader = CoverDownloader(targets[0], meta_dir + '/failures.json', config['cover_url'], config['connections'])
+    failures = downloader.run(covers, config['resume'])
+
+    if failures:
+        print('%s cover downloads failed (retry with `resume=1`)' % len(failures))
+
+
+def check_age_ratings(targets):
+    books = []
+
+    for json_file in get_files('json', 'src'):
+        category = get_name(json_file)
+
+        for data in load_books(json_file):
+            books.append({
+                'ISBN': data['ISBN'],
+                'Kategorie': category,
+                'Altersempfehlung': data['Altersempfehlung'],
+            })
+
+    # Validate all age ratings at once
+    violations = validate_age_ratings(DataFrame(books, columns=['ISBN', 'Kategorie', 'Altersempfehlung']))
+
+    # Provide age ratings from KNV exports as suggestions
+    suggestions = {parse_isbn(isbn): rating for isbn, rating in load_csv()[['ISBN', 'Altersempfehlung']].values}
+
+    # Store improper age ratings in JSON file (editable, used when processing data), but
+    # (1) .. skip category mismatches (being valid ratings, see report below)
+    # (2) .. add new ISBNs only, so that corrections made by hand are being kept
+    overrides = dict(load_json(targets[2])) if os.path.isfile(targets[2]) else {}
+
+    for isbn, rating in violations[violations['reason'] != 'category'][['ISBN', 'Altersempfehlung']].values:
+        overrides.setdefault(isbn, rating)
+
+    dump_json(overrides, targets[2])
+
+    # Store details about improper age ratings
+    dump_json([{
+        'isbn': violation['ISBN'],
+        'category': violation['Kategorie'],
+        'rating': violation['Altersempfehlung'],
+        'range': [to_number(violation['min']), to_number(violation['max'])],
+        'expected': [to_number(violation['expected_min']), to_number(violation['expected_max'])],
+        'reason': violation['reason'],
+        'suggestion': suggestions.get(parse_isbn(violation['ISBN']), ''),
+    } for violation in violations.to_dict('records')], targets[4])
+
+    age_ratings = []
+
+    for violation in violations.to_dict('records'):
+        age_ratings.append('%s: %s (%s, %s)' % (
+            violation['ISBN'],
+            violation['Altersempfehlung'],
+            violation['Kategorie'],
+            violation['reason'],
+        ))
+
+    if not age_ratings:
+        # .. otherwise there isn't anything to report back, really
+        age_ratings = ['No improper age ratings found!']
+
+    # Save improper age ratings
+    write_lines(age_ratings, targets[3])
+
+
+def compose_mails(targets):
+    # Load books (including their page numbers)
+    books = get_issue()
+
+    # Collect summary (being written at once)
+    summary = []
+
+    # Build text block for each book, sorted by (1) page number, (2) author & (3) book title
+    books['Zeile'] = books['AutorInnen'] + ' - "' + books['Titel'] + '" auf Seite ' + books['Seite'].astype(str)
+    books = books.sort_values(['Seite', 'AutorInnen', 'Titel'], kind='stable')
+
+    # Group them by publisher
+    publishers = {publisher: list(lines) for publisher, lines in books.groupby('Verlag', observed=True)['Zeile']}
+
+    # Build text block for each of them
+    for publisher in sorted(publishers, key=str.casefold):
+        text_blocks = publishers[publisher]
+
+        # Add to summary
+        summary += [publisher + ':'] + text_blocks + ['']
+
+        # Build output filepath
+        mail_file = dist_dir + '/documents/mails/' + slug(publisher) + '.eml'
+
+        # Load text parts
+        text_block = '<br>'.join(text_blocks)
+
+        # (1) Grab season text
+        with open(assets + '/mails/' + season + '.html', 'r') as file:
+            season_text = ''.join(file.readlines())
+
+        # (2) Replace year placeholders
+        for placeholder, replacement in {
+            '%%LAST_YEAR%%': last_year,
+            '%%THIS_YEAR%%': year,
+            '%%NEXT_YEAR%%': year + '/' + next_year[2:],
+        }.items():
+            season_text = season_text.replace(placeholder, replacement)
+
+        # (3) Grab email signature
+        with open(assets + '/mails/signature.html', 'r') as file:
+            signature = ''.join(file.readlines())
+
+        text = (
+            '<html><head></head><body>'
+            + season_text + '<p>' + text_block + '</p>' + signature +
+            '</body></html>'
+        )
+
+        # Create subject
+        subject = 'Empfehlungsliste ' + season_de + ' ' + year
+
+        # Attach publisher's pages (if extracted, see `extract_excerpts`)
+        excerpt_file = dist_dir + '/documents/excerpts/' + slug(publisher) + '.pdf'
+
+        create_mail(
+            is_from='info@fundevogel.de',
+            subject=subject, text=text,
+            attachments=[excerpt_file],
+            output_path=mail_file
+        )
+
+    write_lines(summary, targets[0])
+
+
+def optimize_sizes(dependencies, targets):
+    # Build one document per target size, eg '10MB' => `ISSUE/2021-herbst-buchempfehlungen_10mb.pdf`
+    sizes = {size: parse_size(size) for size in config['sizes'].split(',')}
+
+    optimizer = SizeOptimizer(dependencies[0], get_optimize_command, ArtefactCache(config['artefacts']))
+    report = optimizer.run({get_document(slug(size)): file_size for size, file_size in sizes.items()})
+
+    # Record chosen resolutions
+    report['targets'] = {size: dict(report['targets'][get_document(slug(size))], file=get_document(slug(size))) for size in sizes}
+
+    for size, result in report['targets'].items():
+        print('%s: %s DPI (%.1f MB%s)' % (size, result['dpi'], result['size'] / 1000 ** 2, '' if result['fits'] else ', too large'))
+
+    dump_json(report, targets[-1])
+
+
+def build_excerpts(targets):
+    excerpts_dir = os.path.dirname(targets[0])
+    create_path(excerpts_dir)
+
+    # Collect pages per publisher
+    books = get_issue()
+    books = books[books['Seite'] > 0]
+
+    excerpts = {}
+
+    for publisher, pages in books.groupby('Verlag', observed=True)['Seite']:
+        excerpts[publisher] = {
+            'file': slug(publisher) + '.pdf',
+
+            # Start with cover page
+            'pages': [1] + sorted(set(pages) - {1}),
+        }
+
+    # Copy pages (instead of rendering them), many publishers at a time
+    document = get_document(slug(config['excerpts']))
+
+    def extract(excerpt):
+        extract_pages(document, excerpt['pages'], excerpts_dir + '/' + excerpt['file'])
+
+    with ThreadPoolExecutor(max_workers=config['workers']) as executor:
+        list(executor.map(extract, excerpts.values()))
+
+    # Remove excerpts of publishers no longer featured
+    files = [excerpt['file'] for excerpt in excerpts.values()]
+
+    for file in os.listdir(excerpts_dir):
+        if file.endswith('.pdf') and file not in files:
+            os.remove(excerpts_dir + '/' + file)
+
+    dump_json(excerpts, targets[0])
+
+
+def reconcile_books(targets):
+    stages = {}
+
+    # Collect ISBNs per category for each stage, being ..
+    # (1) .. KNV exports
+    csv = load_csv()
+    stages['src/csv'] = {category: get_isbns(isbns) for category, isbns in csv.groupby('Kategorie', observed=True)['ISBN']}
+
+    # (2) .. fetched & processed data
+    for mode in ['src', 'dist']:
+        stages[mode + '/json'] = {
+            get_name(json_file): get_isbns(book['ISBN'] for book in load_books(json_file))
+            for json_file in get_files('json', mode)
+        }
+
+    # (3) .. books in template, assigned to category by section
+    tree = load_tree(get_template('edited'))
+    pages = {page: name for name, numbers in get_sections(tree, get_section_names()) for page in numbers}
+
+    stages['sla'] = {}
+
+    for isbn, (page, *_) in tree['books'].items():
+        stages['sla'].setdefault(pages.get(page, 'document'), set()).update(get_isbns([isbn]))
+
+    # Compare each stage with the one before
+    report = ['%s: %s books' % (stage, sum(len(isbns) for isbns in categories.values())) for stage, categories in stages.items()]
+    results = {}
+
+    names = list(stages)
+
+    for before, after in zip(names, names[1:]):
+        results[before + ' > ' + after] = {}
+
+        # Collect all books per stage (telling missing books from moved ones)
+        total_before = set().union(*stages[before].values())
+        total_after = set().union(*stages[after].values())
+
+        for category in sorted(set(stages[before]) | set(stages[after])):
+            isbns_before = stages[before].get(category, set())
+            isbns_after = stages[after].get(category, set())
+
+            # Determine books being ..
+            result = {
+                # (1) .. not found at all
+                'missing': isbns_before - isbns_after - total_after,
+
+                # (2) .. found in another category
+                'moved': (isbns_before - isbns_after) & total_after,
+
+                # (3) .. not found before
+                'extra': isbns_after - isbns_before - total_before,
+            }
+
+            result = {key: sorted(str(isbn) for isbn in isbns) for key, isbns in result.items()}
+
+            if not any(result.values()):
+                continue
+
+            results[before + ' > ' + after][category] = result
+
+            for key, isbns in result.items():
+                if isbns:
+                    report.append('%s > %s (%s), %s: %s' % (before, after, category, key, ', '.join(isbns)))
+
+    dump_json(results, targets[1])
+
+    write_lines(report, targets[0])
+
+
+def check_images(dependencies, targets):
+    sla_file = dependencies[0]
+
+    # Check every image (once), using cached results for unchanged files
+    results = Preflight().run(get_images(parse_sla(sla_file), os.path.dirname(sla_file)), config['min_dpi'])
+
+    # Sort by page & frame (rather than order of objects in template)
+    results.sort(key=itemgetter('page', 'frame'))
+
+    dump_json(results, targets[1])
+
+    # Report problems per page
+    report = []
+
+    for result in results:
+        for level, problems in [('ERROR', result['errors']), ('WARNING', result['warnings'])]:
+            for problem in problems:
+                report.append('Page %s, frame %s: %s %s (%s)' % (result['page'], result['frame'], level, problem, result['file'] or '-'))
+
+    if not report:
+        report = ['All images look fine!']
+
+    write_lines(report, targets[0])
+
+    # Fail if images are missing (or broken)
+    errors = sum(len(result['errors']) for result in results)
+
+    if errors:
+        print('%s broken image(s), see %s' % (errors, targets[0]))
+
+        return False
+
+
+def compile_statistics(targets):
+    books = get_issue()
+
+    # Determine books, publishers, pages & average price per category
+    categories = books.groupby('Kategorie', observed=True).agg(
+        books=('ISBN', 'size'),
+        publishers=('Verlag', 'nunique'),
+        first=('Seite', 'min'),
+        last=('Seite', 'max'),
+        price=('Preis', 'mean'),
+    )
+
+    statistics = {
+        # (1) Categories (in order of appearance)
+        'categories': {
+            heading: {
+                'books': int(categories.at[category, 'books']),
+                'publishers': int(categories.at[category, 'publishers']),
+                'pages': [int(categories.at[category, 'first']), int(categories.at[category, 'last'])],
+                'price': to_number(round(categories.at[category, 'price'], 2)),
+            }
+            for category, heading in headings.items() if category in categories.index
+        },
+
+        # (2) Books per publisher & binding (most first)
+        'publishers': {publisher: int(count) for publisher, count in books['Verlag'].value_counts().items() if count},
+        'bindings': {binding: int(count) for binding, count in books['Einband'].value_counts().items() if count},
+    }
+
+    dump_json(statistics, targets[2])
+
+
+def extract_data(targets):
+    # Group books by category
+    books = {headings[get_name(json_file)]: [] for json_file in get_files('json', 'dist')}
+
+    for record in iter_records():
+        books[record.pop('category')].append(record)
+
+    # Store results
+    dump_json(books, targets[1])
+
+
+def export_records(targets):
+    ndjson_file, state_file = targets
+
+    # Load hashes of records exported previously (if any) ..
+    state = None
+
+    if os.path.isfile(ndjson_file) and os.path.isfile(state_file):
+        state = load_json(state_file)
+
+    hashes = {}
+
+    # .. appending changed records only, otherwise start over
+    with open(ndjson_file, 'w' if state is None else 'a') as file:
+        for record in iter_records():
+            line = json.dumps(record, ensure_ascii=False)
+            digest = hashlib.sha256(line.encode('utf-8')).hexdigest()
+
+            hashes[record['isbn']] = digest
+
+            if state is None or state.get(record['isbn']) != digest:
+                file.write(line + '\n')
+
+        # Mark removed records
+        if state is not None:
+            for isbn in state:
+                if isbn not in hashes:
+                    file.write(json.dumps({'isbn': isbn, 'deleted': True}) + '\n')
+
+    dump_json(hashes, state_file)
+
+
+def prepare_template(input_file, output_file):
+    replacements = {
+        '%%SEASON%%': season_de,
+        '%%YEAR%%': year,
+        '%%NEXT_YEAR%%': next_year,
+    }
+
+    # Replace spring template names with autumn ones
+    templates = [
+        'cover_spring',
+        'toc_spring',
+        'section_spring',
+        'category_spring',
+    ]
+
+    # Base template features spring colors ..
+    if season == 'autumn':
+        # .. therefore, we have to change in case of autumn edition
+        for template in templates:
+            # .. achieved with a simple substitution
+            replacements['MNAM="' + template] = 'MNAM="' + template.replace('spring', 'autumn')
+
+    substitute(input_file, output_file, replacements)
+
+
+def build_document(command, dependencies, targets):
+    sla_file = dependencies[0]
+
+    # Consider placed images, since they change output without changing template
+    images = {image_file for _, image_file, *_ in get_images(parse_sla(sla_file), os.path.dirname(sla_file))}
+
+    return run_cached(command, 'scribus', dependencies, targets, [image_file for image_file in images if os.path.isfile(image_file)])
+
+
+def run_cached(command, tool, dependencies, targets, extras=[]):
+    # Restore outputs from earlier runs with identical inputs, command line & tool version
+    return ArtefactCache(config['artefacts']).run(command, dependencies, targets, tool, extras)
+
+
+def build_sections(dependencies, targets):
+    sla_file = dependencies[0]
+
+    # Hash everything affecting all pages as well as every single page
+    tree = load_tree(sla_file)
+
+    sections_dir = dist_dir + '/documents/pdf/sections'
+    create_path(sections_dir)
+
+    section_files = []
+    jobs = []
+
+    for name, pages in get_sections(tree, get_section_names()):
+        # Determine section file, named after its contents
+        digest = hash_section(tree, pages)
+        section_file = sections_dir + '/' + name + '-' + digest[:16] + '.pdf'
+
+        section_files.append(section_file)
+
+        # Render sections not being cached
+        if not os.path.isfile(section_file):
+            jobs.append((sla_file, section_file, [page + 1 for page in pages]))
+
+    if jobs:
+        WorkerPool(min(config['workers'], len(jobs))).map(render_section, jobs)
+
+    # Assemble document by concatenating pages
+    create_path(os.path.dirname(targets[0]))
+    subprocess.run(['qpdf', '--empty', '--pages'] + section_files + ['--', targets[0]], check=True)
+
+    # Remove outdated sections
+    for file in os.listdir(sections_dir):
+        if sections_dir + '/' + file not in section_files:
+            os.remove(sections_dir + '/' + file)
+
+
+def render_section(session, sla_file, section_file, pages):
+    # Export to temporary file first, so that cache never holds incomplete sections
+    temp_file = section_file[:-4] + '.tmp.pdf'
+
+    export_pdf(session, sla_file, temp_file, pages)
+    os.replace(temp_file, section_file)
+
+
+def build_preview(dependencies, targets):
+    sla_file = dependencies[0]
+
+    # Hash everything affecting all pages as well as every single page
+    tree = load_tree(sla_file)
+
+    preview_dir = os.path.dirname(targets[0])
+    create_path(preview_dir)
+
+    images = []
+    missing = []
+
+    for page in range(len(tree['pages'])):
+        # Determine image file, named after page contents
+        digest = hash_section(tree, [page])
+        image_file = '%s/page-%03d-%s.png' % (preview_dir, page + 1, digest[:16])
+
+        images.append(image_file)
+
+        # Render pages not being cached
+        if not os.path.isfile(image_file):
+            missing.append((page + 1, image_file))
+
+    if missing:
+        # Distribute pages evenly across workers
+        size = min(config['workers'], len(missing))
+        jobs = [(sla_file, missing[index::size], 72) for index in range(size)]
+
+        WorkerPool(size).map(export_images, jobs)
+
+    # Remove outdated images
+    for file in os.listdir(preview_dir):
+        if file.endswith('.png') and preview_dir + '/' + file not in images:
+            os.remove(preview_dir + '/' + file)
+
+    # Build index
+    figures = [
+        '<figure><a href="%s"><img src="%s" loading="lazy"></a><figcaption>%s</figcaption></figure>' % (
+            os.path.basename(image_file),
+            os.path.basename(image_file),
+            index + 1,
+        ) for index, image_file in enumerate(images)
+    ]
+
+    write_file(targets[0], (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        + '<title>' + season_de + ' ' + year + '</title>'
+        + '<style>body{display:flex;flex-wrap:wrap;font-family:sans-serif}'
+        + 'figure{margin:8px;text-align:center}img{width:200px;box-shadow:0 0 4px #999}</style>'
+        + '</head><body>' + ''.join(figures) + '</body></html>'
+    ))
+
+#
+# ACTIONS (END)
+###
+
+
 ###
 # HELPERS (START)
 #
 
+def get_document(dpi: str = '') -> str:
+    # Final document, or optimized one of given resolution (or size, eg '10mb', see `optimize_pdf`)
+    if not dpi:
+        return get_template('document')
+
+    return home_dir + '/' + str(now.year) + '-' + slug(season_de) + '-buchempfehlungen_' + dpi + '.pdf'
+
+
+def get_optimize_command(dpi: str) -> str:
+    # Ghostscript command line for given resolution (see `run_cached`)
+    return ' '.join([
+        'gs',
+        '-dCompatibilityLevel=1.4',
+        '-dNOPAUSE',
+        '-dBATCH',
+        '-dQUIET',
+
+        # Performance
+        # See https://ghostscript.com/doc/current/Use.htm#Improving_performance
+        '-dNumRenderingThreads=8',               # Increase number of threads
+        '-dBandHeight=100',                      # Increase band size
+        '-dBufferSpace=1000000000',              # Reduce per-band overhead
+        '-dNOGC',                                # Disable garbage collector
+
+        # Font optimization
+        '-dSubsetFonts=true',
+        '-dCompressFonts=true',
+
+        # Image quality & colors
+        # Manually apply '-dPDFSETTINGS=XY' where XY ..
+        # /default
+        # /screen:    72dpi
+        # /ebook:    150dpi
+        # /printer:  300dpi
+        # /prepress: 300dpi
+        '-dMonoImageResolution=' + dpi,
+        '-dGrayImageResolution=' + dpi,
+        '-dColorImageResolution=' + dpi,
+        '-dDownsampleMonoImages=true',
+        '-dDownsampleGrayImages=true',
+        '-dDownsampleColorImages=true',
+        '-dConvertCMYKImagesToRGB=true',
+
+        # I/O
+        '-sDEVICE=pdfwrite',
+        '-sOutputFile=%(targets)s',
+        '-f %(dependencies)s',
+    ])
+
+
 def get_files(extension: str, mode: str) -> list:
     # Build categories
     categories = list(headings.keys())
@@ -760,15 +1443,63 @@ def get_files(extension: str, mode: str) -> list:
     if mode not in directory:
         return []
 
-    return [directory[mode] + '/' + extension + '/' + file for file in files if os.path.isfile(directory[mode] + '/' + extension + '/' + file)]
+    # Include compressed files
+    files = [find_file(directory[mode] + '/' + extension + '/' + file) for file in files]
+
+    return [file for file in files if os.path.isfile(file)]
+
+
+def get_archive() -> list:
+    # Earlier issues, eg 'issues/2021_01' for '2021_02'
+    return [
+        'issues/' + name for name in sorted(os.listdir('issues'))
+        if name < issue and os.path.isdir('issues/' + name + '/src')
+    ]
+
+
+def get_archive_files() -> list:
+    files = []
+
+    for issue_dir in get_archive():
+        for extension in ['json', 'csv']:
+            files += list_files(issue_dir + '/src/' + extension + '/*.' + extension)
+
+    return files
+
+
+def get_issue():
+    # Combine data of current issue (see `lib/issue.py`), using cached files
+    books = load_issue(issue, load_books=load_books, load_index=load_sla)
+
+    # Refuse to go on without processed data (instead of writing empty results)
+    if books.empty:
+        raise ValueError('No books found in %s (see `process_data`)' % (dist_dir + '/json'))
+
+    return books
+
+
+def get_isbns(values) -> set:
+    # Parse ISBNs, skipping invalid ones (see `check_data`)
+    return {isbn for isbn in map(parse_isbn, values) if isbn is not None}
+
+
+def get_section_names() -> list:
+    # Name sections after categories (in order of appearance)
+    categories = [get_name(json_file) for json_file in get_files('json', 'dist')]
+
+    return [category for category, _ in reversed(structure) if category in categories]
 
 
 def get_template(template: str) -> str:
     if template == 'base':
         return dist_dir + '/templates/base.sla'
 
+    if template == 'processed':
+        return dist_dir + '/templates/processed.sla'
+
     if template == 'edited':
-        return dist_dir + '/templates/edited.sla'
+        # May be stored compressed (see `scripts/python/compress_files.py`)
+        return find_file(dist_dir + '/templates/edited.sla')
 
     if template == 'document':
         return dist_dir + '/documents/pdf/final.pdf'
@@ -779,6 +1510,18 @@ def get_template(template: str) -> str:
     if template == 'age-ratings':
         return conf_dir + '/age-ratings.json'
 
+    if template == 'books':
+        return dist_dir + '/books.pickle'
+
+
+def get_partial(category: str) -> str:
+    return dist_dir + '/templates/partials/' + category + '.sla'
+
+
+def load_csv():
+    # Load KNV exports (using cached table if up-to-date)
+    return load_csv_files(get_files('csv', 'src'), get_template('books'))
+
 #
 # HELPERS (END)
 ###
@@ -788,20 +1531,26 @@ def get_template(template: str) -> str:
 # UTILITIES (START)
 #
 
-def replace(path, pattern, replacement):
-    # Replace pattern inside a given file
-    file = fileinput.input(path, inplace=True)
+def substitute(input_file, output_file, replacements: dict):
+    # Replace patterns while copying a given file
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-    for line in file:
-        line = re.sub(pattern, replacement, line)
-        sys.stdout.write(line)
+    # Write to temporary file first, so that target is never left incomplete
+    temp_file = get_temp_file(output_file)
 
-    file.close()
+    with open_file(input_file, 'r') as source, open_file(temp_file, 'w') as target:
+        for line in source:
+            for pattern, replacement in replacements.items():
+                line = line.replace(pattern, replacement)
+
+            target.write(line)
+
+    replace_file(temp_file, find_file(output_file))
 
 
 def create_path(path):
     # Determine if (future) target is appropriate data file
-    if os.path.splitext(path)[1].lower() in ['.csv', '.json']:
+    if os.path.splitext(strip_suffix(path))[1].lower() in ['.csv', '.json']:
         path = os.path.dirname(path)
 
     if not os.path.exists(path):
@@ -815,8 +1564,7 @@ def create_path(path):
 
 def load_json(json_file):
     try:
-        with open(json_file, 'r') as file:
-            return json.load(file)
+        return cached(find_file(json_file), _load_json)
 
     except json.decoder.JSONDecodeError:
         raise Exception
@@ -824,61 +1572,82 @@ def load_json(json_file):
     return {}
 
 
+def _load_json(json_file):
+    with open_file(json_file, 'r') as file:
+        return json.load(file)
+
+
+def load_books(json_file):
+    # Load books as compact records (see `lib/book.py`)
+    return cached(json_file, read_books)
+
+
+def load_sla(sla_file):
+    # Index books in Scribus template file
+    return cached(sla_file, read_index)
+
+
+def cached(path, loader):
+    # Keep parsed files in memory until they change
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    if (path, loader) not in cache or cache[(path, loader)][0] != key:
+        cache[(path, loader)] = (key, loader(path))
+
+    return cache[(path, loader)][1]
+
+
 def dump_json(data, json_file):
     create_path(json_file)
 
-    with open(json_file, 'w') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    # Leave unchanged files alone, so that dependent tasks aren't run again
+    write_file(json_file, json.dumps(data, ensure_ascii=False, indent=4))
 
 
-def slug(string: str) -> str:
-    # Slugify string using german custom replacements
-    return slugify(string, replacements=([
-        ['Ü', 'UE'],
-        ['ü', 'ue'],
-        ['Ö', 'OE'],
-        ['ö', 'oe'],
-        ['Ä', 'AE'],
-        ['ä', 'ae'],
-        ['ß', 'ss'],
-    ]))
+def write_lines(lines, path):
+    write_file(path, ''.join(line + '\n' for line in lines))
 
 
-def extract_books(input_file: str):
-    json_files = get_files('json', 'dist')
+def to_number(value):
+    # Convert missing values (eg `NaN`) to `None`
+    if isna(value):
+        return None
 
-    # Parsing Scribus template file
-    text_elements = etree.parse(input_file).getroot().findall('.//PAGEOBJECT/StoryText/ITEXT')
+    return value
 
-    books = []
+
+def iter_records():
+    # Index books in Scribus template file
+    index = load_sla(get_template('edited'))
 
     # Parsing JSON data files
-    for json_file in json_files:
-        # Determine category
-        category = headings[os.path.basename(json_file)[:-5]]
-
-        for data in load_json(json_file):
-            book = {
-                'AutorIn': data['AutorInnen'],
-                'Titel': data['Titel'],
-                'Verlag': data['Verlag'],
-                'Seitenzahl': 0,
-                'Kategorie': category,
-            }
+    for json_file in get_files('json', 'dist'):
+        # Determine heading
+        heading = headings[get_name(json_file)]
+
+        # Extract books from template (sorted by author)
+        for json_data in sorted(load_books(json_file), key=itemgetter('Sortierung')):
+            # Look for matching ISBN
+            book = index.get(parse_isbn(json_data['ISBN']), {'header': [], 'body': []})
 
-            for element in text_elements:
-                if data['ISBN'] in element.attrib['CH']:
-                    # Determine page number
-                    parent = element.xpath('./../..')
-                    page = int(parent[0].attrib['OwnPage'])
+            yield {
+                # (1) ISBN, sorting order & author(s)
+                # Fix edge cases when author is undefined
+                # See 978-3-649-64031-8
+                'isbn': json_data['ISBN'],
+                'sort': json_data['Sortierung'],
+                'author': json_data['AutorInnen'] or '',
 
-                    # Store data
-                    book['Seitenzahl'] = page + 1
+                # (2) Header
+                'header': book['header'],
 
-            books.append(book)
+                # (3) Text body (excluding ISBN, age rating & retail price)
+                'body': book['body'][:-2],
 
-    # Sort by (1) page number, (2) publisher, (3) author & (4) book title
-    return sorted(books, key=itemgetter('Seitenzahl', 'Verlag', 'AutorIn', 'Titel'))
+                # (4) Category heading
+                'category': heading,
+            }
 
 
 def create_mail(
@@ -893,7 +1662,13 @@ def create_mail(
 ):
     # Create `eml` file
     # (1) Add message header
-    mail = MIMEMultipart()
+    # Derive boundary from contents when build time is fixed, so that mails are reproducible
+    boundary = None
+
+    if config['epoch']:
+        boundary = '===============' + hashlib.sha256((subject + text + ''.join(attachments)).encode('utf-8')).hexdigest()[:19] + '=='
+
+    mail = MIMEMultipart(boundary=boundary)
     mail['Subject'] = subject
     mail['To'] = goes_to
     mail['From'] = is_from
@@ -905,18 +1680,33 @@ def create_mail(
     body = MIMEText(text, 'html', 'utf-8')
     mail.attach(body)
 
-    # (3) Add attachments
-    if attachments:
-        for attachment in attachments:
-            attachment = add_attachment(attachment)
+    # (3) Write contents ..
+    attachments = [attachment for attachment in attachments if os.path.isfile(attachment)]
+
+    # Write to temporary file first, keeping unchanged mails (see `replace_file`)
+    temp_file = output_path + '.tmp'
+
+    with open(temp_file, 'w') as file:
+        if not attachments:
+            generator.Generator(file).flatten(mail)
+
+        else:
+            # .. leaving message open for attachments
+            buffer = io.StringIO()
+            generator.Generator(buffer).flatten(mail)
+
+            closing = '--' + mail.get_boundary() + '--'
+            contents = buffer.getvalue()
+
+            file.write(contents[:contents.rindex(closing)])
+
+            # (4) Add attachments, streaming them (so that large files never have to fit into memory)
+            for attachment in attachments:
+                write_attachment(file, attachment, mail.get_boundary())
 
-            if attachment:
-                mail.attach(attachment)
+            file.write(closing + '\n')
 
-    # (4) Write contents
-    with open(output_path, 'w') as file:
-        output_path = generator.Generator(file)
-        output_path.flatten(mail)
+    return replace_file(temp_file, output_path)
 
 
 def get_rfc2822_date():
@@ -927,47 +1717,201 @@ def get_rfc2822_date():
     return utils.formatdate(timestamp)
 
 
-def add_attachment(file_path: str):
-    # Checking if attachment file exists
-    if os.path.isfile(file_path):
+def write_attachment(file, file_path: str, boundary: str):
+    # Detect filetype
+    file_type, encoding = guess_type(file_path)
 
-        # Detecting filetype
-        file_type, encoding = guess_type(file_path)
+    if file_type is None or encoding is not None:
+        file_type = 'application/octet-stream'
 
-        if file_type is None or encoding is not None:
-            file_type = 'application/octet-stream'
+    # Add attachment header
+    file.write('--' + boundary + '\n')
+    file.write('Content-Type: ' + file_type + '\n')
+    file.write('MIME-Version: 1.0\n')
+    file.write('Content-Transfer-Encoding: base64\n')
+    file.write('Content-Disposition: attachment; filename="' + os.path.basename(file_path) + '"\n\n')
 
-        type_primary, type_secondary = file_type.split('/', 1)
+    # Encode chunk by chunk (57 bytes making one line of 76 characters)
+    with open(file_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(57 * 1024), b''):
+            file.write(base64.encodebytes(chunk).decode('ascii'))
 
-        if type_primary == 'text':
-            with open(file_path) as file:
-                data = MIMEText(file.read(), type_secondary)
+    file.write('\n')
 
-        elif type_primary == 'image':
-            with open(file_path, 'rb') as file:
-                data = MIMEImage(file.read(), type_secondary)
+#
+# UTILITIES (END)
+###
 
-        elif type_primary == 'audio':
-            with open(file_path, 'rb') as file:
-                data = MIMEAudio(file.read(), type_secondary)
 
-        else:
-            with open(file_path, 'rb') as file:
-                data = MIMEBase(type_primary, type_secondary)
-                data.set_payload(file.read())
+###
+# PROFILING (START)
+#
+
+def profiled(creator):
+    # Profile Python actions of task(s), eg `doit finish_issue profile=1`
+    basename = creator.__name__[5:]
+
+    @wraps(creator)
+    def generate():
+        result = creator()
+
+        if isinstance(result, dict):
+            return with_profiler(basename, result)
+
+        return (with_profiler(basename + '-' + get_name(str(task['name']).strip("[]'")), task) for task in result)
+
+    return generate
 
-            encoders.encode_base64(data)
 
-        # Build filename
-        file_name = os.path.basename(file_path)
+def with_profiler(label, task):
+    task = dict(task)
 
-        # Add attachment header
-        data.add_header('Content-Disposition', 'attachment', filename=file_name)
+    if task.get('actions') is not None:
+        task['actions'] = [profile_action(label, action) for action in task['actions']]
 
-        return data
+    return task
 
-    return False
+
+def profile_action(label, action):
+    # Leave shell commands alone
+    if isinstance(action, str):
+        return action
+
+    function, *args = action if isinstance(action, tuple) else (action,)
+
+    @wraps(function)
+    def run(*arguments, **keywords):
+        # Determine output files when running (so that they end up in given issue)
+        with Profiler(meta_dir + '/profiles/' + label + '-' + function.__name__, config['tracemalloc']):
+            return function(*arguments, **keywords)
+
+    return (run, *args) if args else run
+
+
+if config['profile'] or config['tracemalloc']:
+    for function_name, function in list(globals().items()):
+        if function_name.startswith('task_'):
+            globals()[function_name] = profiled(function)
 
 #
-# UTILITIES (END)
+# PROFILING (END)
+###
+
+
+###
+# BATCH (START)
+#
+
+# Tasks being generated once (instead of per issue)
+SHARED_TASKS = [
+    'task_phase_one',
+    'task_phase_two',
+    'task_phase_three',
+    'task_stop_scribus',
+    'task_watch_issue',
+]
+
+# Files (per issue) each task requires, so that archived issues lacking them
+# are skipped (instead of being overwritten with empty results)
+# Note: Tasks require whatever their dependencies require
+REQUIREMENTS = {
+    'task_ingest_csv': ['src/csv/*.csv'],
+    'task_fetch_api': ['src/csv/*.csv'],
+    'task_fetch_covers': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_check_data': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_process_data': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_create_template': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_generate_partials': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_import_partials': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_prepare_editing': ['src/csv/*.csv', 'src/json/*.json'],
+    'task_build_pdf': ['dist/templates/edited.sla'],
+    'task_preflight': ['dist/templates/edited.sla'],
+    'task_preview': ['dist/templates/edited.sla'],
+    'task_optimize_pdf': ['dist/templates/edited.sla'],
+    'task_extract_excerpts': ['dist/json/*.json', 'dist/templates/edited.sla'],
+    'task_reconcile_data': ['dist/json/*.json', 'dist/templates/edited.sla'],
+    'task_finish_issue': ['dist/json/*.json', 'dist/templates/edited.sla'],
+    'task_export_data': ['dist/json/*.json', 'dist/templates/edited.sla'],
+}
+
+
+def has_requirements(name: str, creator) -> bool:
+    return all(list_files('issues/' + name + '/' + pattern) for pattern in REQUIREMENTS.get(creator.__name__, []))
+
+
+def batch(creator):
+    # Generate task(s) for each issue, combining them into one task graph
+    basename = creator.__name__[5:]
+
+    @wraps(creator)
+    def generate():
+        for name in issues:
+            if not has_requirements(name, creator):
+                continue
+
+            use_issue(name)
+
+            result = creator()
+
+            # (1) Single task per issue, eg `check_data:2021_02`
+            if isinstance(result, dict):
+                yield for_issue(name, dict(result, name=name))
+
+                continue
+
+            # (2) Several tasks per issue, grouped by issue
+            subtasks = [for_issue(name, subtask) for subtask in result]
+            task_dep = ['%s:%s' % (basename, subtask['name']) for subtask in subtasks]
+
+            yield from subtasks
+
+            yield {
+                'name': name,
+                'actions': None,
+                'task_dep': task_dep,
+            }
+
+    return generate
+
+
+def for_issue(name, task):
+    task = dict(task)
+
+    # Run Python actions with settings & directories of given issue
+    if task.get('actions') is not None:
+        task['actions'] = [in_issue(name, action) for action in task['actions']]
+
+    # Depend on tasks of same issue
+    task['task_dep'] = [
+        '%s:%s' % (dependency, name) if 'task_' + dependency not in SHARED_TASKS else dependency
+        for dependency in task.get('task_dep', [])
+    ]
+
+    return task
+
+
+def in_issue(name, action):
+    # Leave shell commands alone (being built for given issue already)
+    if isinstance(action, str):
+        return action
+
+    function, *args = action if isinstance(action, tuple) else (action,)
+
+    @wraps(function)
+    def run(*arguments, **keywords):
+        use_issue(name)
+
+        return function(*arguments, **keywords)
+
+    return (run, *args) if args else run
+
+
+# Process several issues at once, eg `doit -n 4 phase_three issue=all`
+if len(issues) > 1:
+    for function_name, function in list(globals().items()):
+        if function_name.startswith('task_') and function_name not in SHARED_TASKS:
+            globals()[function_name] = batch(function)
+
+#
+# BATCH (END)
 ###
@@ -0,0 +1,88 @@
+from pandas import DataFrame, Series, to_numeric
+
+
+# Age ratings, eg ..
+# (1) .. KNV exports: 'ab 10 J.', 'von 12 - 99 J.' or 'ab 18 Mon.'
+# (2) .. KNV API: 'ab 10 Jahren', 'ab 12 Monaten' or 'von 4 bis 8 Jahren'
+PATTERN = r'(?i)(?:(?P<prefix>ab|von|bis)\s*)?(?P<min>\d+)(?:\s*(?:-|bis)\s*(?P<max>\d+))?\s*(?P<unit>J|Mon)'
+
+# Upper bound for open-ended age ratings
+MAX_AGE = 99
+
+# Expected minimum age (in years) per category,
+# categories not listed here accept any age rating
+EXPECTED = {
+    'toddler': (0, 2),
+    'bilderbuch': (2, 6),
+    'vorlesebuch': (3, 8),
+    'ab6': (5, 7),
+    'ab8': (7, 9),
+    'ab10': (9, 11),
+    'ab12': (11, 13),
+    'ab14': (13, 18),
+}
+
+# Categories without age ratings
+UNRATED = ['kalender']
+
+
+def parse_age_ratings(ratings: Series) -> DataFrame:
+    # Extract all components at once
+    parts = ratings.fillna('').str.extract(PATTERN)
+
+    # Convert months to years
+    factor = parts['unit'].str.lower().map({'j': 1, 'mon': 1 / 12})
+
+    lower = to_numeric(parts['min'], errors='coerce') * factor
+    upper = to_numeric(parts['max'], errors='coerce') * factor
+
+    # Determine age range ..
+    # (1) .. for ratings like 'bis 6 Jahre'
+    capped = parts['prefix'].str.lower() == 'bis'
+    upper = upper.where(~capped, lower)
+    lower = lower.where(~capped, 0)
+
+    # (2) .. for open-ended ratings like 'ab 10 Jahren'
+    upper = upper.where(upper.notna() | lower.isna(), MAX_AGE)
+
+    return DataFrame({'min': lower, 'max': upper}, index=ratings.index)
+
+
+def validate_age_ratings(books: DataFrame) -> DataFrame:
+    # Parse age ratings
+    ages = parse_age_ratings(books['Altersempfehlung'])
+
+    data = books[['ISBN', 'Kategorie', 'Altersempfehlung']].copy()
+    data['min'] = ages['min']
+    data['max'] = ages['max']
+
+    # Determine expected range per category
+    categories = data['Kategorie'].astype(object)
+
+    data['expected_min'] = categories.map({category: lower for category, (lower, upper) in EXPECTED.items()}).astype(float)
+    data['expected_max'] = categories.map({category: upper for category, (lower, upper) in EXPECTED.items()}).astype(float)
+
+    # Skip books without age rating (eg calendars)
+    rated = ~data['Kategorie'].isin(UNRATED) & (data['Altersempfehlung'].fillna('') != '')
+
+    # Detect improper age ratings, being either ..
+    reasons = {
+        # (1) .. missing or unparsable
+        'missing': rated & data['min'].isna(),
+
+        # (2) .. closed ranges (eg 'von 4 bis 8 Jahren')
+        'bounded': rated & data['max'].notna() & (data['max'] < MAX_AGE),
+
+        # (3) .. not matching their category
+        'category': rated & data['min'].notna() & data['expected_min'].notna() & (
+            (data['min'] < data['expected_min']) | (data['min'] > data['expected_max'])
+        ),
+    }
+
+    data['reason'] = None
+
+    # Apply reasons in reverse order of importance
+    for reason, mask in reversed(list(reasons.items())):
+        data.loc[mask, 'reason'] = reason
+
+    return data[data['reason'].notna()].reset_index(drop=True)
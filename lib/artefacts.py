@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+
+from functools import lru_cache
+
+from lib.files import hash_file, replace_file
+
+
+# Default location of artefact cache (may be shared between machines, eg via network drive)
+CACHE_DIR = '.cache/artefacts'
+
+# Repository root (for locating scripts below)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Scripts driving tools (whose export settings change outputs as much as tool versions do)
+SCRIPTS = {
+    'scribus': [
+        'scripts/python/build_pdf.py',
+        'scripts/python/scribus_worker.py',
+        'lib/scribus.py',
+    ],
+}
+
+
+@lru_cache()
+def get_version(tool: str) -> str:
+    # Determine tool version, eg 'gs' => '9.53.3'
+    try:
+        return subprocess.run([tool, '--version'], capture_output=True, text=True, timeout=60).stdout.strip()
+
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+# Stores outputs of commands, keyed by their inputs, command line & tool version
+class ArtefactCache:
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+
+    def get_key(self, command: str, inputs: list, tool: str) -> str:
+        return hashlib.sha256(json.dumps({
+            # Command line (with placeholders instead of file paths)
+            'command': command,
+
+            # Contents of input files (in order)
+            'inputs': [hash_file(input_file) for input_file in inputs],
+
+            # Tool version
+            'tool': [tool, get_version(tool)],
+
+            # Contents of scripts driving tool
+            'scripts': [hash_file(os.path.join(ROOT, script)) for script in SCRIPTS.get(tool, [])],
+        }).encode('utf-8')).hexdigest()
+
+
+    def get_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+
+    def restore(self, key: str, outputs: list) -> bool:
+        entry_dir = self.get_dir(key)
+
+        if not os.path.isfile(os.path.join(entry_dir, 'meta.json')):
+            return False
+
+        for index, output_file in enumerate(outputs):
+            os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+
+            # Copy to temporary file first, so that outputs are never incomplete (nor touched when unchanged)
+            shutil.copyfile(os.path.join(entry_dir, str(index)), output_file + '.tmp')
+            replace_file(output_file + '.tmp', output_file)
+
+        return True
+
+
+    def store(self, key: str, outputs: list, meta: dict):
+        entry_dir = self.get_dir(key)
+
+        if os.path.isdir(entry_dir):
+            return
+
+        # Fill temporary directory first, so that entries are never incomplete
+        temp_dir = '%s.%s.tmp' % (entry_dir, os.getpid())
+        os.makedirs(temp_dir, exist_ok=True)
+
+        for index, output_file in enumerate(outputs):
+            shutil.copyfile(output_file, os.path.join(temp_dir, str(index)))
+
+        with open(os.path.join(temp_dir, 'meta.json'), 'w') as file:
+            json.dump(dict(meta, outputs=[os.path.basename(output_file) for output_file in outputs]), file, indent=4)
+
+        try:
+            os.rename(temp_dir, entry_dir)
+
+        # Another process (or machine) was faster
+        except OSError:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+    def run(self, command: str, dependencies: list, outputs: list, tool: str, extras: list = []) -> bool:
+        # Restore outputs of identical runs (also considering files not passed to command, eg images) ..
+        key = self.get_key(command, dependencies + sorted(extras), tool)
+
+        if self.restore(key, outputs):
+            print('Restored %s from cache (%s)' % (', '.join(outputs), key[:16]))
+
+            return True
+
+        # .. otherwise run command & store outputs
+        result = subprocess.run(command % {
+            'python': sys.executable,
+            'dependencies': ' '.join(dependencies),
+            'targets': ' '.join(outputs),
+        }, shell=True)
+
+        if result.returncode != 0:
+            return False
+
+        self.store(key, outputs, {
+            'command': command,
+            'tool': [tool, get_version(tool)],
+            'created': int(time.time()),
+        })
+
+        return True
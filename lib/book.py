@@ -0,0 +1,127 @@
+import sys
+import json
+import zlib
+
+from lib.files import open_file
+
+
+# Fields with few distinct values (being shared between books)
+INTERNED = {
+    'Verlag',
+    'Einband',
+    'Erscheinungsjahr',
+    'Altersempfehlung',
+    'Preis',
+    'Kategorien',
+    'Themen',
+    'Reihe',
+    'Band',
+    'Seitenzahl',
+    'Abmessungen',
+    'Antolin',
+    'Sortierung',
+    'AutorIn',
+    'AutorInnen',
+    'IllustratorIn',
+    'ZeichnerIn',
+    'PhotographIn',
+    'ÜbersetzerIn',
+    'HerausgeberIn',
+    'MitarbeiterIn',
+}
+
+# Fields being stored compressed, and decompressed on access only
+COMPRESSED = {
+    'Inhaltsbeschreibung',
+}
+
+# Field positions per key order (plus those to intern & compress),
+# being shared by books with the same fields
+LAYOUTS = {}
+
+
+def get_layout(keys: tuple) -> tuple:
+    if keys not in LAYOUTS:
+        LAYOUTS[keys] = (
+            {key: index for index, key in enumerate(keys)},
+            [index for index, key in enumerate(keys) if key in INTERNED],
+            [index for index, key in enumerate(keys) if key in COMPRESSED],
+        )
+
+    return LAYOUTS[keys]
+
+
+# Book record, behaving like a read-only dict (eg `book['ISBN']`),
+# storing its values in a tuple (instead of a hash table per book)
+class Book:
+    __slots__ = ('layout', 'values')
+
+
+    def __init__(self, pairs):
+        if isinstance(pairs, dict):
+            pairs = list(pairs.items())
+
+        self.layout, interned, compressed = get_layout(tuple(key for key, _ in pairs))
+
+        values = [value for _, value in pairs]
+
+        for index in interned:
+            if isinstance(values[index], str):
+                values[index] = sys.intern(values[index])
+
+        # Store long text compressed (saving ~40%), since it's rarely used
+        for index in compressed:
+            if isinstance(values[index], str):
+                values[index] = zlib.compress(values[index].encode('utf-8'), 1)
+
+        self.values = tuple(values)
+
+
+    def __getitem__(self, key):
+        value = self.values[self.layout[key]]
+
+        if key in COMPRESSED and isinstance(value, bytes):
+            return zlib.decompress(value).decode('utf-8')
+
+        return value
+
+
+    def get(self, key, default=None):
+        if key not in self.layout:
+            return default
+
+        return self[key]
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.layout
+
+
+    def __iter__(self):
+        return iter(self.layout)
+
+
+    def __len__(self) -> int:
+        return len(self.layout)
+
+
+    def keys(self):
+        return self.layout.keys()
+
+
+    def items(self):
+        return [(key, self[key]) for key in self.layout]
+
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+
+    def __repr__(self) -> str:
+        return 'Book(%s)' % self.get('ISBN')
+
+
+def read_books(json_file: str) -> list:
+    # Build books while parsing (skipping intermediate dicts)
+    with open_file(json_file, 'r') as file:
+        return json.load(file, object_pairs_hook=Book)
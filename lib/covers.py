@@ -0,0 +1,283 @@
+import os
+import ssl
+import json
+import asyncio
+
+from urllib.parse import urljoin, urlsplit
+
+from lib.files import replace_file
+
+
+# Default cover source, eg 'https://www.vlb.de/GetBlob.aspx?strIsbn=9783423627382&size=L'
+COVER_URL = 'https://www.vlb.de/GetBlob.aspx?strIsbn={isbn}&size=L'
+
+# Maximum number of simultaneous requests
+LIMIT = 8
+
+
+class HTTPError(Exception):
+    pass
+
+
+async def read_response(reader) -> tuple:
+    # Parse status line, eg 'HTTP/1.1 200 OK'
+    status_line = await reader.readline()
+
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+
+    status = int(status_line.split()[1])
+
+    # Parse headers (lowercasing names)
+    headers = {}
+
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+
+        if not line:
+            break
+
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    # Read body, being either ..
+    # (1) .. absent
+    if status in [204, 304] or status < 200:
+        return status, headers, b''
+
+    # (2) .. sent in chunks
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+
+            if size == 0:
+                # Skip trailers
+                while (await reader.readline()).strip():
+                    pass
+
+                break
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+        return status, headers, b''.join(chunks)
+
+    # (3) .. of known length
+    if 'content-length' in headers:
+        return status, headers, await reader.readexactly(int(headers['content-length']))
+
+    # (4) .. ending with connection
+    headers['connection'] = 'close'
+
+    return status, headers, await reader.read()
+
+
+class ConnectionPool:
+    def __init__(self, limit: int = LIMIT, timeout: float = 30):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.timeout = timeout
+
+        # Open connections per server (waiting to be reused)
+        self.idle = {}
+
+
+    async def connect(self, server: tuple) -> tuple:
+        connections = self.idle.setdefault(server, [])
+
+        # Reuse open connection (if any) ..
+        while connections:
+            reader, writer = connections.pop()
+
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+
+            writer.close()
+
+        # .. otherwise open new one
+        scheme, host, port = server
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl.create_default_context() if scheme == 'https' else None)
+
+        return reader, writer, False
+
+
+    async def request(self, url: str, headers: dict = {}, redirects: int = 5) -> tuple:
+        # Limit number of simultaneous requests
+        async with self.semaphore:
+            return await asyncio.wait_for(self.send(url, headers, redirects), self.timeout)
+
+
+    async def send(self, url: str, headers: dict, redirects: int) -> tuple:
+        parts = urlsplit(url)
+        server = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+
+        request = ['GET %s HTTP/1.1' % path, 'Host: %s' % parts.netloc, 'Connection: keep-alive', 'User-Agent: select-novelties']
+        request += ['%s: %s' % header for header in headers.items()]
+
+        while True:
+            reader, writer, reused = await self.connect(server)
+
+            try:
+                writer.write(('\r\n'.join(request) + '\r\n\r\n').encode('latin-1'))
+                await writer.drain()
+
+                status, response_headers, body = await read_response(reader)
+
+                break
+
+            # Retry once with new connection, since servers may close idle ones anytime
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+
+                if not reused:
+                    raise
+
+            except BaseException:
+                writer.close()
+
+                raise
+
+        # Keep connection open for next request
+        if response_headers.get('connection', '').lower() == 'close':
+            writer.close()
+
+        else:
+            self.idle[server].append((reader, writer))
+
+        # Follow redirects
+        if status in [301, 302, 303, 307, 308] and 'location' in response_headers:
+            if redirects == 0:
+                raise HTTPError('Too many redirects (%s)' % url)
+
+            return await self.send(urljoin(url, response_headers['location']), headers, redirects - 1)
+
+        return status, response_headers, body
+
+
+    def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+
+        self.idle = {}
+
+
+def write_file(path: str, data: bytes):
+    # Write to temporary file first, so that images are never incomplete
+    with open(path + '.tmp', 'wb') as file:
+        file.write(data)
+
+    replace_file(path + '.tmp', path)
+
+
+def load_json(json_file: str, default):
+    if not os.path.isfile(json_file):
+        return default
+
+    with open(json_file, 'r') as file:
+        return json.load(file)
+
+
+def dump_json(data, json_file: str):
+    with open(json_file + '.tmp', 'w') as file:
+        json.dump(data, file, ensure_ascii=False, indent=4)
+
+    replace_file(json_file + '.tmp', json_file)
+
+
+class CoverDownloader:
+    def __init__(self, state_file: str, failures_file: str, url: str = COVER_URL, limit: int = LIMIT):
+        # ETag & modification date per ISBN (for conditional requests)
+        self.state_file = state_file
+
+        # Failed (or pending) downloads, see `meta/failures.json`
+        self.failures_file = failures_file
+
+        self.url = url
+        self.limit = limit
+
+
+    def run(self, covers: dict, resume: bool = False) -> list:
+        # Download covers, eg {'978-3-423-62738-2': ('9783423627382', 'dist/images/sasja.jpg'), ..}
+        return asyncio.run(self.download(covers, resume))
+
+
+    async def download(self, covers: dict, resume: bool) -> list:
+        state = load_json(self.state_file, {})
+        failures = load_json(self.failures_file, {'data': [], 'cover': []})
+
+        # Retry failed (or pending) downloads only ..
+        if resume:
+            covers = {isbn: cover for isbn, cover in covers.items() if isbn in failures['cover']}
+
+        # .. marking all of them as pending, so that interrupted runs may be resumed
+        pending = set(covers)
+        failures['cover'] = sorted(pending)
+        self.save(state, failures)
+
+        pool = ConnectionPool(self.limit)
+
+        async def fetch(isbn: str):
+            digits, image_file = covers[isbn]
+
+            try:
+                state[isbn] = await self.fetch(pool, self.url.format(isbn=digits), image_file, state.get(isbn))
+                pending.discard(isbn)
+
+            # Fail single ISBN only, including truncated (or malformed) responses
+            except (OSError, EOFError, ValueError, HTTPError, asyncio.TimeoutError, asyncio.LimitOverrunError) as error:
+                print('Downloading cover for %s failed: %s' % (isbn, error or type(error).__name__))
+
+        try:
+            await asyncio.gather(*[fetch(isbn) for isbn in covers])
+
+        finally:
+            pool.close()
+
+            failures['cover'] = sorted(pending)
+            self.save(state, failures)
+
+        return failures['cover']
+
+
+    async def fetch(self, pool: ConnectionPool, url: str, image_file: str, state: dict = None) -> dict:
+        headers = {}
+
+        # Only download covers again if they changed
+        if state is not None and os.path.isfile(image_file):
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+
+            if state.get('modified'):
+                headers['If-Modified-Since'] = state['modified']
+
+        status, response_headers, body = await pool.request(url, headers)
+
+        if status == 304:
+            return state
+
+        if status != 200 or not body:
+            raise HTTPError('Unexpected response (%s)' % status)
+
+        if not response_headers.get('content-type', 'image/').startswith('image/'):
+            raise HTTPError('Unexpected content type (%s)' % response_headers['content-type'])
+
+        os.makedirs(os.path.dirname(os.path.abspath(image_file)), exist_ok=True)
+        await asyncio.get_running_loop().run_in_executor(None, write_file, image_file, body)
+
+        return {
+            'file': os.path.basename(image_file),
+            'etag': response_headers.get('etag'),
+            'modified': response_headers.get('last-modified'),
+        }
+
+
+    def save(self, state: dict, failures: dict):
+        for json_file in [self.state_file, self.failures_file]:
+            os.makedirs(os.path.dirname(os.path.abspath(json_file)), exist_ok=True)
+
+        dump_json(state, self.state_file)
+        dump_json(failures, self.failures_file)
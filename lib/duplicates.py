@@ -0,0 +1,221 @@
+import os
+import re
+import unicodedata
+
+from difflib import SequenceMatcher
+from glob import glob
+
+from lib.book import read_books
+from lib.files import get_name, list_files
+from lib.isbn import parse as parse_isbn
+from lib.knv import read_csv_files
+
+
+# Edition markers, eg 'Die feuerrote Frederike, 1 Audio-CD'
+EDITIONS = r'(?i)[,:.(\s-]*\b(?:\d+\s+)?(?:audio-?cds?|mp3-?cds?|cds?|mp3|h(?:ö|oe)rbuch|h(?:ö|oe)rspiel|taschenbuch|sonderausgabe|jubil(?:ä|ae)umsausgabe|neuausgabe)\b[)\s]*'
+
+# Words too common to tell titles apart
+STOPWORDS = {
+    'der', 'die', 'das', 'des', 'dem', 'den',
+    'ein', 'eine', 'einer', 'eines', 'einem', 'einen',
+    'und', 'oder', 'mit', 'von', 'vom', 'zum', 'zur', 'im', 'in', 'am', 'an', 'auf', 'aus', 'fur',
+    'band', 'teil', 'folge', 'bd',
+}
+
+# Blocks larger than this are too generic to be useful
+MAX_BLOCK = 50
+
+# Years (as found in titles of calendars, yearbooks, ..)
+YEAR = re.compile(r'(?:19|20)\d{2}')
+
+# Score deduction for titles having volume numbers on one side only
+PENALTY = 0.1
+
+# Minimum similarity of two titles (by the same author) to be considered the same work
+THRESHOLD = 0.85
+
+
+def fold(text: str) -> str:
+    # Lowercase ASCII without diacritics & punctuation, eg 'Hörbuch!' => 'horbuch'
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+
+def get_author(sorting: str) -> str:
+    # Surname of first author, eg 'Auer, Margit; Dulleck, Nina' => 'auer'
+    return fold((sorting or '').split(';')[0].split(',')[0])
+
+
+def get_title(title: str) -> tuple:
+    # Separate words from numbers (being volumes most of the time)
+    words = fold(re.sub(EDITIONS, ' ', title or '')).split()
+
+    tokens = [word for word in words if not word.isdigit() and word not in STOPWORDS]
+    numbers = frozenset(word.lstrip('0') for word in words if word.isdigit())
+
+    return ' '.join(tokens), numbers
+
+
+def get_key(book: dict) -> dict:
+    title, numbers = get_title(book.get('Titel', ''))
+
+    # Prefer explicit series information over volume numbers in title
+    series = fold(book.get('Reihe', ''))
+    volume = fold(book.get('Band', ''))
+
+    if series and volume:
+        numbers = frozenset([volume.lstrip('0')])
+
+    return {
+        'isbn': parse_isbn(book['ISBN']) or book['ISBN'],
+        'author': get_author(book.get('Sortierung', '')),
+        'title': title,
+        'numbers': numbers,
+        'series': (series, volume) if series and volume else None,
+    }
+
+
+def get_blocks(keys: list) -> dict:
+    blocks = {}
+
+    # Only compare books sharing ..
+    for index, key in enumerate(keys):
+        # (1) .. author & any title word
+        for token in set(key['title'].split()):
+            blocks.setdefault(('title', key['author'], token), []).append(index)
+
+        # (2) .. series & volume
+        if key['series'] is not None:
+            blocks.setdefault(('series', key['author']) + key['series'], []).append(index)
+
+        # (3) .. ISBN
+        blocks.setdefault(('isbn', key['isbn']), []).append(index)
+
+    return {block: indices for block, indices in blocks.items() if 1 < len(indices) <= MAX_BLOCK}
+
+
+def compare(this: dict, that: dict) -> float:
+    # Same edition
+    if this['isbn'] == that['isbn']:
+        return 1.0
+
+    # Different volumes are different works
+    if this['numbers'] and that['numbers'] and this['numbers'] != that['numbers']:
+        return 0.0
+
+    # Same series & volume by the same author
+    if this['series'] is not None and this['series'] == that['series']:
+        return 1.0
+
+    penalty = 0.0
+
+    # Numbered vs unnumbered titles ..
+    if bool(this['numbers']) != bool(that['numbers']):
+        # (1) .. being dated are different works, eg 'Die Schule der magischen Tiere'
+        # & its calendar 'Schule der magischen Tiere 2022'
+        if any(YEAR.fullmatch(number) for number in this['numbers'] | that['numbers']):
+            return 0.0
+
+        # (2) .. being volumes are less likely the same work
+        penalty = PENALTY
+
+    # Compare words (rather than characters), so that
+    # 'nicht schwimmen konnte' doesn't match 'nicht schlafen konnte'
+    return max(0.0, SequenceMatcher(None, this['title'].split(), that['title'].split()).ratio() - penalty)
+
+
+def find_clusters(books: list, threshold: float = THRESHOLD) -> list:
+    keys = [get_key(book) for book in books]
+
+    # Map indices to their cluster (using union-find)
+    parents = list(range(len(books)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+
+        return index
+
+    # Score pairs within each block (each pair only once)
+    scores = {}
+
+    for indices in get_blocks(keys).values():
+        for position, this in enumerate(indices):
+            for that in indices[position + 1:]:
+                if (this, that) in scores:
+                    continue
+
+                scores[(this, that)] = score = compare(keys[this], keys[that])
+
+                if score >= threshold:
+                    parents[find(that)] = find(this)
+
+    # Collect clusters, being rated by their weakest link
+    clusters = {}
+
+    for (this, that), score in scores.items():
+        if score < threshold:
+            continue
+
+        cluster = clusters.setdefault(find(this), {'members': set(), 'confidence': 1.0})
+        cluster['members'].update([this, that])
+        cluster['confidence'] = min(cluster['confidence'], score)
+
+    return [
+        {
+            'confidence': round(cluster['confidence'], 2),
+            'books': [books[index] for index in sorted(cluster['members'])],
+        }
+        for cluster in sorted(clusters.values(), key=lambda cluster: min(cluster['members']))
+    ]
+
+
+def read_issue(issue_dir: str) -> list:
+    books = collect_books(issue_dir)
+
+    # Remove books listed twice within the same category
+    return list({(book['ISBN'], book['Kategorie']): book for book in books}.values())
+
+
+def collect_books(issue_dir: str) -> list:
+    # Issue name, eg 'issues/2021_02' => '2021_02'
+    issue = os.path.basename(os.path.normpath(issue_dir))
+
+    books = []
+
+    # Prefer JSON files (providing series information) ..
+    json_files = list_files(os.path.join(issue_dir, 'src', 'json', '*.json'))
+
+    if json_files:
+        for json_file in json_files:
+            for data in read_books(json_file):
+                books.append({
+                    'ISBN': data['ISBN'],
+                    'Sortierung': data['Sortierung'],
+                    'Titel': data['Titel'],
+                    'Reihe': data.get('Reihe', ''),
+                    'Band': data.get('Band', ''),
+                    'Kategorie': get_name(json_file),
+                    'Ausgabe': issue,
+                })
+
+        return books
+
+    # .. over CSV files (older issues)
+    data = read_csv_files(sorted(glob(os.path.join(issue_dir, 'src', 'csv', '*.csv'))))
+
+    for isbn, author, title, category in zip(data['ISBN'], data['AutorIn'], data['Titel'], data['Kategorie']):
+        books.append({
+            'ISBN': isbn,
+            'Sortierung': author,
+            'Titel': title,
+            'Reihe': '',
+            'Band': '',
+            'Kategorie': category,
+            'Ausgabe': issue,
+        })
+
+    return books
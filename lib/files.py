@@ -0,0 +1,159 @@
+import io
+import os
+import gzip
+import filecmp
+import hashlib
+
+from contextlib import contextmanager
+from glob import glob
+
+# Optional, see `open_file`
+try:
+    import zstandard
+
+except ImportError:
+    zstandard = None
+
+
+# Suffixes of compressed files (in order of preference)
+SUFFIXES = ['.gz', '.zst']
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_suffix(path: str) -> str:
+    # Determine compression, eg 'edited.sla.gz' => '.gz'
+    suffix = os.path.splitext(path)[1]
+
+    return suffix if suffix in SUFFIXES else ''
+
+
+def strip_suffix(path: str) -> str:
+    # Remove compression, eg 'edited.sla.gz' => 'edited.sla'
+    return path[:-len(get_suffix(path))] if get_suffix(path) else path
+
+
+def get_name(path: str) -> str:
+    # Determine filename w/o extension, eg 'src/json/ab6.json.gz' => 'ab6'
+    return os.path.splitext(os.path.basename(strip_suffix(path)))[0]
+
+
+def find_file(path: str) -> str:
+    # Prefer given file, falling back to compressed variants (if any)
+    if os.path.isfile(path):
+        return path
+
+    for suffix in SUFFIXES:
+        if os.path.isfile(strip_suffix(path) + suffix):
+            return strip_suffix(path) + suffix
+
+    return path
+
+
+def get_temp_file(path: str) -> str:
+    # Build temporary file with same compression, eg 'edited.sla.gz' => 'edited.sla.tmp.gz'
+    path = find_file(path)
+
+    return strip_suffix(path) + '.tmp' + get_suffix(path)
+
+
+def list_files(pattern: str) -> list:
+    # Find files, including compressed ones (eg 'src/json/*.json' => [.., 'src/json/ab6.json.gz'])
+    files = {}
+
+    for suffix in [''] + SUFFIXES:
+        for path in glob(pattern + suffix):
+            files.setdefault(strip_suffix(path), path)
+
+    return [files[path] for path in sorted(files)]
+
+
+@contextmanager
+def open_file(path: str, mode: str = 'r'):
+    # Read & write (compressed) files alike, keeping existing compression when overwriting
+    path = find_file(path)
+    suffix = get_suffix(path)
+
+    if suffix == '.gz':
+        # Omit timestamp, so that same contents make same files
+        with gzip.GzipFile(path, mode[0] + 'b', compresslevel=6, mtime=0) as stream:
+            with (stream if 'b' in mode else io.TextIOWrapper(stream, encoding='utf-8')) as file:
+                yield file
+
+        return
+
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError('Reading "%s" requires zstandard, see https://pypi.org/project/zstandard' % path)
+
+        with open(path, mode[0] + 'b') as raw:
+            if 'r' in mode:
+                stream = zstandard.ZstdDecompressor().stream_reader(raw)
+
+            else:
+                stream = zstandard.ZstdCompressor(level=10).stream_writer(raw)
+
+            with (stream if 'b' in mode else io.TextIOWrapper(stream, encoding='utf-8')) as file:
+                yield file
+
+        return
+
+    with open(path, mode) as file:
+        yield file
+
+
+def write_file(path: str, contents: str) -> bool:
+    # Write file only if its contents changed (keeping modification time otherwise)
+    path = find_file(path)
+
+    if os.path.isfile(path):
+        with open_file(path, 'r') as file:
+            if file.read() == contents:
+                return False
+
+    temp_file = get_temp_file(path)
+
+    with open_file(temp_file, 'w') as file:
+        file.write(contents)
+
+    os.replace(temp_file, path)
+
+    return True
+
+
+def replace_file(temp_file: str, path: str) -> bool:
+    # Move file into place only if its contents changed (discarding it otherwise)
+    if os.path.isfile(path) and filecmp.cmp(temp_file, path, shallow=False):
+        os.remove(temp_file)
+
+        return False
+
+    os.replace(temp_file, path)
+
+    return True
+
+
+def compress_file(path: str, suffix: str = '.gz') -> str:
+    # Store file compressed (replacing original file), or plain (with empty suffix)
+    output_file = strip_suffix(path) + suffix
+    temp_file = strip_suffix(path) + '.tmp' + suffix
+
+    # Stream contents, so that large files never have to fit into memory
+    with open_file(path, 'rb') as source, open_file(temp_file, 'wb') as target:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            target.write(chunk)
+
+    os.replace(temp_file, output_file)
+
+    if path != output_file:
+        os.remove(path)
+
+    return output_file
@@ -0,0 +1,171 @@
+import re
+
+
+# Registrant ranges per registration group, as (lowest, highest, length),
+# applied to the (zero-padded) first seven digits following the group,
+# see https://www.isbn-international.org/range_file_generation
+RANGES = {
+    # English language
+    '978-0': [
+        (0, 1999999, 2),
+        (2000000, 6999999, 3),
+        (7000000, 8499999, 4),
+        (8500000, 8999999, 5),
+        (9000000, 9499999, 6),
+        (9500000, 9999999, 7),
+    ],
+    '978-1': [
+        (0, 999999, 2),
+        (1000000, 3999999, 3),
+        (4000000, 5499999, 4),
+        (5500000, 8697999, 5),
+        (8698000, 9989999, 6),
+        (9990000, 9999999, 7),
+    ],
+    # German language
+    '978-3': [
+        (0, 299999, 2),
+        (300000, 339999, 3),
+        (340000, 369999, 4),
+        (370000, 399999, 5),
+        (400000, 1999999, 2),
+        (2000000, 6999999, 3),
+        (7000000, 8499999, 4),
+        (8500000, 8999999, 5),
+        (9000000, 9499999, 6),
+        (9500000, 9539999, 7),
+        (9540000, 9699999, 5),
+        (9700000, 9849999, 7),
+        (9850000, 9999999, 5),
+    ],
+    # Spain
+    '978-84': [
+        (0, 1399999, 2),
+        (1400000, 1499999, 3),
+        (1500000, 1999999, 5),
+        (2000000, 6999999, 3),
+        (7000000, 8499999, 4),
+        (8500000, 8999999, 5),
+        (9000000, 9199999, 4),
+        (9200000, 9239999, 6),
+        (9240000, 9299999, 5),
+        (9300000, 9499999, 6),
+        (9500000, 9699999, 5),
+        (9700000, 9999999, 4),
+    ],
+    # Italy
+    '978-88': [
+        (0, 1999999, 2),
+        (2000000, 5999999, 3),
+        (6000000, 8499999, 4),
+        (8500000, 8999999, 5),
+        (9000000, 9099999, 6),
+        (9100000, 9299999, 3),
+        (9300000, 9399999, 4),
+        (9400000, 9499999, 6),
+        (9500000, 9999999, 5),
+    ],
+}
+
+# Hyphenated forms, being built on demand
+FORMATS = {}
+
+
+def get_check_digit(digits: str) -> int:
+    # EAN-13 check digit (of first twelve digits)
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits[:12]))
+
+    return (10 - total % 10) % 10
+
+
+def get_isbn10_check_digit(digits: str) -> str:
+    total = sum(int(digit) * (10 - index) for index, digit in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+
+    return 'X' if check == 10 else str(check)
+
+
+# International Standard Book Number (or EAN-13, eg for calendars),
+# stored as 13-digit integer, eg '978-3-401-60604-0' => 9783401606040
+class ISBN(int):
+    __slots__ = ()
+
+
+    def __new__(cls, value):
+        if isinstance(value, ISBN):
+            return value
+
+        if isinstance(value, int):
+            digits = '%013d' % value
+
+        else:
+            # Remove hyphens & whitespace, eg '978-3-401-60604-0' or '3 401 60604 X'
+            digits = re.sub(r'[\s-]', '', str(value)).upper()
+
+            # Convert ISBN-10 to ISBN-13
+            if len(digits) == 10 and digits[:9].isdigit():
+                if digits[9] != get_isbn10_check_digit(digits):
+                    raise ValueError('Invalid ISBN check digit: "%s"' % value)
+
+                digits = '978' + digits[:9]
+                digits += str(get_check_digit(digits))
+
+        if len(digits) != 13 or not digits.isdigit():
+            raise ValueError('Invalid ISBN: "%s"' % value)
+
+        if int(digits[12]) != get_check_digit(digits):
+            raise ValueError('Invalid ISBN check digit: "%s"' % value)
+
+        return super().__new__(cls, int(digits))
+
+
+    @property
+    def digits(self) -> str:
+        return '%013d' % self
+
+
+    @property
+    def hyphenated(self) -> str:
+        if self not in FORMATS:
+            FORMATS[int(self)] = hyphenate(self.digits)
+
+        return FORMATS[self]
+
+
+    def __str__(self) -> str:
+        return self.hyphenated
+
+
+    def __repr__(self) -> str:
+        return "ISBN('%s')" % self.hyphenated
+
+
+def hyphenate(digits: str) -> str:
+    # Determine registration group (eg '978-3'), ..
+    for length in range(1, 6):
+        group = digits[:3] + '-' + digits[3:3 + length]
+
+        if group in RANGES:
+            break
+
+    # .. leaving unknown ones (& EANs) as they are
+    else:
+        return digits
+
+    rest = digits[len(group) - 1:12]
+    key = int(rest[:7].ljust(7, '0'))
+
+    for lowest, highest, size in RANGES[group]:
+        if lowest <= key <= highest:
+            return '-'.join([group, rest[:size], rest[size:], digits[12]])
+
+    return digits
+
+
+def parse(value):
+    # Parse ISBN, being lenient about invalid ones (eg typos)
+    try:
+        return ISBN(value)
+
+    except ValueError:
+        return None
@@ -0,0 +1,104 @@
+import os
+
+from pandas import Categorical, DataFrame, concat, to_numeric
+from slugify import slugify
+
+from lib.book import read_books
+from lib.files import find_file, get_name, list_files
+from lib.isbn import parse as parse_isbn
+from lib.sla import read_index
+
+
+# Columns of issue data (besides issue & category)
+COLUMNS = [
+    'ISBN',
+    'Sortierung',
+    'AutorInnen',
+    'Titel',
+    'Verlag',
+    'Einband',
+    'Preis',
+    'Seitenzahl',
+    'Erscheinungsjahr',
+    'Seite',
+]
+
+
+def slug(string: str) -> str:
+    # Slugify string using german custom replacements, eg 'Bücher ab 10' => 'buecher-ab-10'
+    return slugify(string, replacements=([
+        ['Ü', 'UE'],
+        ['ü', 'ue'],
+        ['Ö', 'OE'],
+        ['ö', 'oe'],
+        ['Ä', 'AE'],
+        ['ä', 'ae'],
+        ['ß', 'ss'],
+    ]))
+
+
+def load_issue(issue: str, load_books=read_books, load_index=read_index) -> DataFrame:
+    issue_dir = os.path.join('issues', issue)
+
+    # Index books in Scribus template file (if present)
+    sla_file = find_file(os.path.join(issue_dir, 'dist', 'templates', 'edited.sla'))
+    index = load_index(sla_file) if os.path.isfile(sla_file) else {}
+
+    rows = []
+
+    for json_file in list_files(os.path.join(issue_dir, 'dist', 'json', '*.json')):
+        # Get category (= filename w/o extension)
+        category = get_name(json_file)
+
+        # Add details only available in source data (eg binding)
+        details = {}
+        src_file = find_file(os.path.join(issue_dir, 'src', 'json', category + '.json'))
+
+        if os.path.isfile(src_file):
+            details = {parse_isbn(book['ISBN']): book for book in load_books(src_file)}
+
+        for book in load_books(json_file):
+            isbn = parse_isbn(book['ISBN'])
+            detail = details.get(isbn, {})
+
+            rows.append([
+                book['ISBN'],
+                book['Sortierung'],
+                book['AutorInnen'] or '',
+                book['Titel'],
+                book['Verlag'],
+                detail.get('Einband', ''),
+                book.get('Preis', ''),
+                detail.get('Seitenzahl', ''),
+                detail.get('Erscheinungsjahr', ''),
+                index[isbn]['page'] if isbn in index else 0,
+                category,
+            ])
+
+    data = DataFrame(rows, columns=COLUMNS + ['Kategorie'])
+
+    # Convert numbers, eg '12,95 €' => 12.95
+    data['Preis'] = to_numeric(data['Preis'].astype(str).str.extract(r'(\d+(?:,\d+)?)')[0].str.replace(',', '.'), errors='coerce')
+
+    for column in ['Seitenzahl', 'Erscheinungsjahr']:
+        data[column] = to_numeric(data[column], errors='coerce').astype('Int64')
+
+    data['Seite'] = data['Seite'].astype(int)
+
+    # Store repeating values only once
+    for column in ['Verlag', 'Einband', 'Kategorie']:
+        data[column] = Categorical(data[column])
+
+    data.insert(0, 'Ausgabe', Categorical([issue] * len(data)))
+
+    return data
+
+
+def load_issues(issues: list, **loaders) -> DataFrame:
+    # Combine several issues (eg for archive-wide analysis)
+    data = concat([load_issue(issue, **loaders) for issue in issues], ignore_index=True)
+
+    for column in ['Ausgabe', 'Verlag', 'Einband', 'Kategorie']:
+        data[column] = Categorical(data[column].astype(object))
+
+    return data
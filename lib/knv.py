@@ -0,0 +1,137 @@
+import os
+
+from pandas import Categorical, DataFrame, concat, read_csv, read_pickle, to_numeric, to_pickle
+
+from lib.ages import parse_age_ratings
+
+
+# Column layout of KNV exports (as used by `scripts/php/pcbis.php`)
+COLUMNS = [
+    'AutorIn',
+    'Titel',
+    'Verlag',
+    'ISBN',
+    'Einband',
+    'Preis',
+    'Meldenummer',
+    'SortRabatt',
+    'Gewicht',
+    'Informationen',
+    'Zusatz',
+    'Kommentar',
+]
+
+# Packed `Informationen` column, eg ' 2021;224 S.;..;210 mm;ab 10 J.;'
+PATTERNS = {
+    'Erscheinungsjahr': r'(?:^|;)\s*((?:19|20)\d{2})\s*(?:;|$)',
+    'Seitenzahl': r'(?:^|;)\s*(\d+)\s*S\.',
+    'Abmessungen': r'(?:^|;)\s*(\d+(?:[.,]\d+)?(?:\s*x\s*\d+(?:[.,]\d+)?)?\s*(?:mm|cm))\s*(?:;|$)',
+    'Altersempfehlung': r'(?:^|;)\s*((?:ab|von)\s[^;]*?(?:J|Mon)\.)',
+}
+
+
+def read_csv_files(csv_files: list):
+    # Decode all files at once, keeping surplus fields caused by broken quoting
+    frames = []
+
+    for csv_file in csv_files:
+        frame = read_csv(
+            csv_file,
+            sep=';',
+            header=None,
+            names=range(len(COLUMNS) + 4),
+            dtype=str,
+            encoding='latin-1',
+            keep_default_na=False,
+        )
+
+        # Determine category (= filename w/o extension)
+        frame['Kategorie'] = os.path.basename(csv_file)[:-4]
+
+        frames.append(frame)
+
+    if not frames:
+        frames.append(DataFrame(columns=list(range(len(COLUMNS) + 4)) + ['Kategorie'], dtype=str))
+
+    return normalize(concat(frames, ignore_index=True))
+
+
+def normalize(raw):
+    # Fix rows spilling over into surplus fields
+    # (1) Detect them ..
+    surplus = list(range(len(COLUMNS), len(COLUMNS) + 4))
+    spilled = (raw[surplus] != '').any(axis=1)
+
+    # (2) .. and fold spilled fields back into `Informationen`
+    for index in raw.index[spilled]:
+        raw.loc[index, range(len(COLUMNS) + 4)] = fold(raw.loc[index, range(len(COLUMNS) + 4)].tolist())
+
+    data = raw[list(range(len(COLUMNS)))].copy()
+    data.columns = COLUMNS
+
+    # Strip whitespace & trailing dots (eg 'Raven.')
+    for column in ['AutorIn', 'Titel', 'Verlag', 'ISBN', 'Einband']:
+        data[column] = data[column].str.strip()
+
+    data['Titel'] = data['Titel'].str.replace(r'\.$', '', regex=True)
+
+    # Convert numbers
+    # (1) Retail price, eg '12.00 EUR'
+    data['Preis'] = to_numeric(data['Preis'].str.extract(r'(\d+(?:[.,]\d+)?)', expand=False).str.replace(',', '.'), errors='coerce')
+
+    # (2) Discount & weight, eg '35.0' & '470 g'
+    data['SortRabatt'] = to_numeric(data['SortRabatt'], errors='coerce')
+    data['Gewicht'] = to_numeric(data['Gewicht'].str.extract(r'(\d+)\s*g', expand=False), errors='coerce')
+
+    # Unpack `Informationen`
+    for column, pattern in PATTERNS.items():
+        data[column] = data['Informationen'].str.extract(pattern, expand=False).fillna('').str.strip()
+
+    data['Erscheinungsjahr'] = to_numeric(data['Erscheinungsjahr'], errors='coerce').astype('Int64')
+    data['Seitenzahl'] = to_numeric(data['Seitenzahl'], errors='coerce').astype('Int64')
+
+    # Determine age range (in years)
+    ages = parse_age_ratings(data['Altersempfehlung'])
+
+    data['AlterVon'] = ages['min']
+    data['AlterBis'] = ages['max']
+
+    # Store category
+    data['Kategorie'] = Categorical(raw['Kategorie'])
+
+    return data
+
+
+def fold(fields: list) -> list:
+    # Determine last non-empty field
+    last = max(index for index, field in enumerate(fields) if field != '')
+
+    # Join everything between `Gewicht` and `Zusatz`
+    folded = fields[:9] + [';'.join(fields[9:last - 1]), fields[last - 1], fields[last]]
+
+    return folded + [''] * (len(fields) - len(folded))
+
+
+def load_csv_files(csv_files: list, cache_file: str):
+    # Use cached table if it is more recent than all exports ..
+    if os.path.isfile(cache_file):
+        mtime = os.path.getmtime(cache_file)
+
+        if all(os.path.getmtime(csv_file) <= mtime for csv_file in csv_files):
+            cache = read_pickle(cache_file)
+
+            # .. and was built from the same exports (none being added, removed or renamed since)
+            if isinstance(cache, dict) and cache['files'] == sorted(csv_files):
+                return cache['data']
+
+    # .. otherwise parse exports & update cache
+    data = read_csv_files(csv_files)
+    dump_csv_files(data, csv_files, cache_file)
+
+    return data
+
+
+def dump_csv_files(data, csv_files: list, cache_file: str):
+    # Store table along with its exports (see `load_csv_files`)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    to_pickle({'files': sorted(csv_files), 'data': data}, cache_file)
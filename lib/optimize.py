@@ -0,0 +1,210 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.artefacts import ArtefactCache
+from lib.files import replace_file
+
+
+# Range of resolutions (in DPI) being searched & step between them
+MIN_DPI = 50
+MAX_DPI = 300
+STEP = 5
+
+# Resolutions used for estimating sizes (on sample pages)
+SAMPLE_DPI = [50, 100, 150, 200, 300]
+
+# Number of sample pages & full runs (per target size)
+SAMPLES = 6
+RUNS = 4
+
+# Size units, eg '10MB' or '512KiB'
+UNITS = {
+    '': 1, 'B': 1,
+    'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3,
+    'KIB': 1024, 'MIB': 1024 ** 2, 'GIB': 1024 ** 3,
+}
+
+
+def parse_size(size: str) -> int:
+    # Convert size to bytes, eg '10MB' => 10000000
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', size)
+
+    if match is None or match.group(2).upper() not in UNITS:
+        raise ValueError('Invalid size "%s", eg use "10MB"' % size)
+
+    return int(float(match.group(1)) * UNITS[match.group(2).upper()])
+
+
+def count_pages(pdf_file: str) -> int:
+    return int(subprocess.run(['qpdf', '--show-npages', pdf_file], capture_output=True, text=True, check=True).stdout)
+
+
+def pick_pages(page_count: int, count: int = SAMPLES) -> list:
+    # Spread sample pages evenly across document (centered within equal parts)
+    if page_count <= count:
+        return list(range(1, page_count + 1))
+
+    return sorted({int((index + 0.5) * page_count / count) + 1 for index in range(count)})
+
+
+def extract_pages(pdf_file: str, pages: list, output_file: str):
+    # Export to temporary file first, so that extracted documents are never incomplete
+    temp_file = output_file[:-4] + '.tmp.pdf'
+
+    # Copy page objects (as well as resources being used) into empty document
+    result = subprocess.run(['qpdf', '--empty', '--pages', pdf_file, ','.join(str(page) for page in pages), '--', temp_file])
+
+    # Tolerate warnings (exit code 3)
+    if result.returncode not in [0, 3]:
+        raise subprocess.CalledProcessError(result.returncode, result.args)
+
+    replace_file(temp_file, output_file)
+
+
+def interpolate(points: list, x: float) -> float:
+    # Interpolate linearly between (ascending) points, eg resolution => size (or vice versa)
+    if x <= points[0][0]:
+        return points[0][1]
+
+    for (x_a, y_a), (x_b, y_b) in zip(points, points[1:]):
+        if x_a <= x < x_b:
+            return y_a + (y_b - y_a) * (x - x_a) / (x_b - x_a)
+
+    return points[-1][1]
+
+
+# Searches highest resolution keeping optimized documents under target sizes
+class SizeOptimizer:
+    def __init__(self, pdf_file: str, build_command, cache: ArtefactCache, min_dpi: int = MIN_DPI, max_dpi: int = MAX_DPI):
+        self.pdf_file = pdf_file
+
+        # Ghostscript command line for given resolution (with placeholders, see `ArtefactCache.run`)
+        self.build_command = build_command
+        self.cache = cache
+
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+
+        # Sample pages, estimated sizes (per resolution, scaled to full document) & actual sizes of full runs
+        self.pages = []
+        self.estimates = []
+        self.sizes = {}
+
+
+    def sample(self):
+        # Estimate sizes on a few representative pages ..
+        page_count = count_pages(self.pdf_file)
+        self.pages = pick_pages(page_count)
+
+        sample_file = os.path.join(self.temp_dir, 'sample.pdf')
+        extract_pages(self.pdf_file, self.pages, sample_file)
+
+        def run(dpi):
+            output_file = os.path.join(self.temp_dir, 'sample-%s.pdf' % dpi)
+
+            if not self.cache.run(self.build_command(str(dpi)), [sample_file], [output_file], 'gs'):
+                raise subprocess.CalledProcessError(1, self.build_command(str(dpi)))
+
+            return os.path.getsize(output_file)
+
+        dots_per_inch = [dpi for dpi in SAMPLE_DPI if self.min_dpi <= dpi <= self.max_dpi]
+        dots_per_inch = sorted(set(dots_per_inch + [self.min_dpi, self.max_dpi]))
+
+        with ThreadPoolExecutor() as executor:
+            sizes = list(executor.map(run, dots_per_inch))
+
+        # .. scaling them to full document (keeping them ascending)
+        for dpi, size in zip(dots_per_inch, sizes):
+            size = size * page_count / len(self.pages)
+            self.estimates.append((dpi, max([size] + [estimate for _, estimate in self.estimates])))
+
+
+    def measure(self, dpi: int) -> int:
+        # Optimize full document at given resolution (once)
+        if dpi not in self.sizes:
+            output_file = os.path.join(self.temp_dir, '%s.pdf' % dpi)
+
+            if not self.cache.run(self.build_command(str(dpi)), [self.pdf_file], [output_file], 'gs'):
+                raise subprocess.CalledProcessError(1, self.build_command(str(dpi)))
+
+            self.sizes[dpi] = os.path.getsize(output_file)
+
+        return self.sizes[dpi]
+
+
+    def guess(self, file_size: int) -> int:
+        # Look up resolution for given size in estimates ..
+        inverse = [(size, dpi) for dpi, size in self.estimates]
+        dpi = interpolate(inverse, file_size)
+
+        # .. correcting them by actual size of closest full run (if any)
+        if self.sizes:
+            closest = min(self.sizes, key=lambda point: abs(point - dpi))
+            dpi = interpolate(inverse, file_size * interpolate(self.estimates, closest) / self.sizes[closest])
+
+        dpi = int(dpi)
+
+        return max(self.min_dpi, min(self.max_dpi, dpi - dpi % STEP))
+
+
+    def search(self, file_size: int) -> int:
+        # Narrow down resolution, starting from estimate
+        for _ in range(RUNS):
+            fitting = [dpi for dpi, size in self.sizes.items() if size <= file_size]
+            exceeding = [dpi for dpi, size in self.sizes.items() if size > file_size]
+
+            # Highest resolution fitting & lowest resolution exceeding target size
+            lower = max(fitting, default=self.min_dpi - STEP)
+            upper = min(exceeding, default=self.max_dpi + STEP)
+
+            if upper - lower <= STEP:
+                break
+
+            # Stay within bounds being known
+            self.measure(max(lower + STEP, min(upper - STEP, self.guess(file_size))))
+
+        fitting = [dpi for dpi, size in self.sizes.items() if size <= file_size]
+
+        if fitting:
+            return max(fitting)
+
+        # Fall back to lowest resolution if nothing fits
+        self.measure(self.min_dpi)
+
+        return self.min_dpi
+
+
+    def run(self, targets: dict) -> dict:
+        # Build document for each target size (in bytes), eg {'issue_10mb.pdf': 10000000}
+        results = {}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.temp_dir = temp_dir
+            self.sample()
+
+            # Start with smallest target size (its runs narrowing down larger ones)
+            for output_file, file_size in sorted(targets.items(), key=lambda item: item[1]):
+                dpi = self.search(file_size)
+
+                # Copy chosen document (keeping unchanged ones, see `replace_file`)
+                shutil.copyfile(os.path.join(temp_dir, '%s.pdf' % dpi), output_file + '.tmp')
+                replace_file(output_file + '.tmp', output_file)
+
+                results[output_file] = {
+                    'target': file_size,
+                    'dpi': dpi,
+                    'size': self.sizes[dpi],
+                    'fits': self.sizes[dpi] <= file_size,
+                }
+
+        return {
+            'pages': self.pages,
+            'estimates': {dpi: int(size) for dpi, size in self.estimates},
+            'runs': dict(sorted(self.sizes.items())),
+            'targets': results,
+        }
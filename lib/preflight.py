@@ -0,0 +1,189 @@
+import os
+import json
+import struct
+
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.files import hash_file
+
+
+# Minimum resolution (in DPI) of placed images
+MIN_DPI = 150
+
+# JPEG markers holding image dimensions (start of frame)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# PNG color types
+PNG_COLORS = {0: 'Gray', 2: 'RGB', 3: 'Indexed', 4: 'Gray', 6: 'RGB'}
+
+
+def read_jpeg(file) -> dict:
+    adobe_transform = None
+
+    # Skip start of image marker, then walk segments
+    file.seek(2)
+
+    while True:
+        byte = file.read(1)
+
+        if not byte:
+            raise ValueError('Unexpected end of JPEG file')
+
+        # Skip fill bytes
+        if byte != b'\xff':
+            continue
+
+        marker = file.read(1)
+
+        while marker == b'\xff':
+            marker = file.read(1)
+
+        marker = ord(marker)
+
+        # Skip markers without segment
+        if marker in range(0xD0, 0xDA) or marker == 0x01:
+            continue
+
+        length = struct.unpack('>H', file.read(2))[0]
+
+        # Adobe segment (telling YCCK from CMYK)
+        if marker == 0xEE:
+            segment = file.read(length - 2)
+
+            if segment[:5] == b'Adobe' and len(segment) >= 12:
+                adobe_transform = segment[11]
+
+            continue
+
+        if marker in SOF_MARKERS:
+            _, height, width, components = struct.unpack('>BHHB', file.read(6))
+
+            colorspace = {1: 'Gray', 3: 'RGB', 4: 'CMYK'}.get(components, 'Unknown')
+
+            if components == 4 and adobe_transform == 2:
+                colorspace = 'YCCK'
+
+            return {'format': 'JPEG', 'width': width, 'height': height, 'colorspace': colorspace}
+
+        # Stop at start of scan, since dimensions come before it
+        if marker == 0xDA:
+            raise ValueError('JPEG file without frame header')
+
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def read_png(file) -> dict:
+    # IHDR chunk always comes first
+    file.seek(8)
+    _, chunk, width, height, _, color = struct.unpack('>I4sIIBB', file.read(18))
+
+    if chunk != b'IHDR':
+        raise ValueError('PNG file without header chunk')
+
+    return {'format': 'PNG', 'width': width, 'height': height, 'colorspace': PNG_COLORS.get(color, 'Unknown')}
+
+
+def read_header(image_file: str) -> dict:
+    # Read image dimensions & color space (without decoding pixel data)
+    with open(image_file, 'rb') as file:
+        signature = file.read(8)
+
+        if signature[:2] == b'\xff\xd8':
+            return read_jpeg(file)
+
+        if signature == b'\x89PNG\r\n\x1a\n':
+            return read_png(file)
+
+    raise ValueError('Unsupported image format')
+
+
+class Preflight:
+    def __init__(self, cache_file: str = '.cache/preflight.json', workers: int = 16):
+        self.cache_file = cache_file
+        self.workers = workers
+
+        # Image properties per file hash (as well as file hash per path & state)
+        self.cache = {'files': {}, 'images': {}}
+
+        if os.path.isfile(cache_file):
+            with open(cache_file, 'r') as file:
+                self.cache = json.load(file)
+
+
+    def inspect(self, image_file: str) -> dict:
+        if not os.path.isfile(image_file):
+            return {'error': 'missing'}
+
+        # Hash files only when they changed
+        stat = os.stat(image_file)
+        state = [stat.st_size, stat.st_mtime_ns]
+
+        entry = self.cache['files'].get(image_file)
+
+        if entry is None or entry[:2] != state:
+            entry = state + [hash_file(image_file)]
+
+        digest = entry[2]
+
+        if digest not in self.cache['images']:
+            try:
+                self.cache['images'][digest] = read_header(image_file)
+
+            except (OSError, ValueError, struct.error) as error:
+                return {'error': 'unreadable (%s)' % error}
+
+        self.cache['files'][image_file] = entry
+
+        return self.cache['images'][digest]
+
+
+    def run(self, references: list, min_dpi: int = MIN_DPI) -> list:
+        # Check each image file once, many at a time
+        image_files = sorted({image_file for _, image_file, *_ in references if image_file})
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            images = dict(zip(image_files, executor.map(self.inspect, image_files)))
+
+        # Store results for next time
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+
+        with open(self.cache_file + '.tmp', 'w') as file:
+            json.dump(self.cache, file)
+
+        os.replace(self.cache_file + '.tmp', self.cache_file)
+
+        results = []
+
+        for page, image_file, scale, frame in references:
+            result = {'page': page, 'frame': frame, 'file': image_file, 'errors': [], 'warnings': []}
+
+            # Report image frames without image ..
+            if not image_file:
+                result['warnings'].append('empty image frame')
+                results.append(result)
+
+                continue
+
+            image = images[image_file]
+
+            # .. as well as missing & unreadable images
+            if 'error' in image:
+                result['errors'].append(image['error'])
+                results.append(result)
+
+                continue
+
+            # Determine effective resolution at placed size
+            dpi = round(72 / scale) if scale else None
+
+            result.update(image, dpi=dpi)
+
+            if dpi is not None and dpi < min_dpi:
+                result['warnings'].append('low resolution (%s DPI)' % dpi)
+
+            if image['colorspace'] not in ['RGB', 'CMYK', 'Gray']:
+                result['warnings'].append('unusual color space (%s)' % image['colorspace'])
+
+            results.append(result)
+
+        return results
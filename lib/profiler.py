@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+import tracemalloc
+
+from collections import Counter
+
+
+# Time (in seconds) between stack samples
+INTERVAL = 0.005
+
+# Number of allocation sites being reported
+LIMIT = 25
+
+
+def get_label(frame) -> str:
+    # Describe frame, eg 'compose_mails (dodo.py:953)'
+    code = frame.f_code
+
+    return '%s (%s:%s)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+# Samples call stacks of a given thread, counting identical stacks
+class Sampler(threading.Thread):
+    def __init__(self, thread_id: int, root, interval: float = INTERVAL):
+        super().__init__(daemon=True)
+
+        self.thread_id = thread_id
+
+        # Frame calling profiled function (stacks being cut off above it)
+        self.root = root
+
+        self.interval = interval
+        self.stopped = threading.Event()
+
+        # Number of samples per stack (being collapsed into one line)
+        self.stacks = Counter()
+
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+
+            while frame is not None and frame is not self.root:
+                stack.append(get_label(frame))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+    def dump(self, path: str):
+        # Write collapsed stacks, eg for `flamegraph.pl` or speedscope
+        with open(path, 'w') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write('%s %s\n' % (stack, count))
+
+
+# Profiles code being run inside its context, writing ..
+# (1) .. pstats file (see `python -m pstats`)
+# (2) .. collapsed stacks (see `Sampler`)
+# (3) .. top allocation sites (if enabled)
+class Profiler:
+    def __init__(self, path: str, memory: bool = False):
+        # Output files without extension, eg 'meta/profiles/finish_issue-compose_mails'
+        self.path = path
+        self.memory = memory
+
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        if self.memory:
+            tracemalloc.start(10)
+
+        self.sampler = Sampler(threading.get_ident(), sys._getframe(1))
+        self.sampler.start()
+
+        self.profile = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.profile.enable()
+
+        return self
+
+
+    def __exit__(self, *exception):
+        self.profile.disable()
+        duration = time.perf_counter() - self.start
+
+        self.sampler.stop()
+
+        self.profile.dump_stats(self.path + '.pstats')
+        self.sampler.dump(self.path + '.folded')
+
+        message = 'Profiled %s in %.2fs' % (os.path.basename(self.path), duration)
+
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                # Skip profiler itself
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.dump_memory(snapshot, peak)
+
+            message += ' (peaking at %.1f MB)' % (peak / 1024 ** 2)
+
+        print(message)
+
+        return False
+
+
+    def dump_memory(self, snapshot, peak: int):
+        # Write allocation sites still holding most memory
+        with open(self.path + '.memory.txt', 'w') as file:
+            file.write('Peak: %.1f MB\n\n' % (peak / 1024 ** 2))
+
+            for statistic in snapshot.statistics('lineno')[:LIMIT]:
+                frame = statistic.traceback[0]
+
+                file.write('%8.1f KB %8s blocks  %s:%s\n' % (statistic.size / 1024, statistic.count, frame.filename, frame.lineno))
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import fcntl
+import queue
+import signal
+import socket
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+# Default location of worker socket
+SOCKET = '.cache/scribus.sock'
+
+# Time (in seconds) to wait for a single command, before considering worker hung
+COMMAND_TIMEOUT = 1800
+
+# Worker script, run inside Scribus
+WORKER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'python', 'scribus_worker.py'))
+
+
+class ScribusError(Exception):
+    pass
+
+
+class WorkerTimeout(ScribusError):
+    pass
+
+
+class Session:
+    def __init__(self, connection, on_timeout=None):
+        self.connection = connection
+        self.stream = connection.makefile('rw')
+
+        # Called when worker doesn't respond in time (see `Worker.session`)
+        self.on_timeout = on_timeout
+
+
+    def __getattr__(self, command):
+        # Forward method calls as commands, eg `session.openDoc(path)`
+        return lambda *args: self.request(command, *args)
+
+
+    def request(self, command: str, *args):
+        try:
+            self.stream.write(json.dumps({'command': command, 'args': args}) + '\n')
+            self.stream.flush()
+
+            line = self.stream.readline()
+
+        except socket.timeout:
+            if self.on_timeout is not None:
+                self.on_timeout()
+
+            raise WorkerTimeout('Worker hung while running "%s"' % command)
+
+        except OSError as error:
+            raise ScribusError('Worker connection lost: %s' % error)
+
+        # Detect crashed worker
+        if not line:
+            raise ScribusError('Worker quit while running "%s"' % command)
+
+        response = json.loads(line)
+
+        if not response['ok']:
+            raise ScribusError(response['error'])
+
+        return response['result']
+
+
+    def close(self):
+        self.stream.close()
+        self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Worker:
+    def __init__(self, socket_path: str = SOCKET, timeout: float = 60, command_timeout: float = COMMAND_TIMEOUT):
+        self.socket_path = os.path.abspath(socket_path)
+
+        # Time (in seconds) to wait for worker startup & for each command
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+
+
+    def connect(self):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.socket_path)
+
+        return Session(connection)
+
+
+    def is_healthy(self) -> bool:
+        try:
+            with self.connect() as session:
+                session.ping()
+
+            return True
+
+        except (OSError, ScribusError):
+            return False
+
+
+    def start(self):
+        # Remove stale socket
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        with open(os.path.splitext(self.socket_path)[0] + '.log', 'a') as log:
+            subprocess.Popen(
+                ['scribus', '-g', '-ns', '-py', WORKER, '--socket', self.socket_path],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+        # Wait for worker to accept connections
+        deadline = time.monotonic() + self.timeout
+
+        while time.monotonic() < deadline:
+            if self.is_healthy():
+                return
+
+            time.sleep(0.1)
+
+        raise ScribusError('Worker did not start within %ss' % self.timeout)
+
+
+    @contextmanager
+    def lock(self):
+        # Guard (re)starting worker by lock file, since other processes may be doing the same
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        with open(os.path.splitext(self.socket_path)[0] + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            yield
+
+
+    def ensure(self):
+        # Start (or restart) worker, unless it's up & running
+        with self.lock():
+            if not self.is_healthy():
+                self.start()
+
+
+    def restart(self, pid: int):
+        # Kill hung worker (along with its process group, see `start`) & start a new one
+        with self.lock():
+            try:
+                os.killpg(os.getpgid(pid), signal.SIGKILL)
+
+            except ProcessLookupError:
+                pass
+
+            self.start()
+
+
+    def session(self) -> Session:
+        self.ensure()
+
+        # Sessions are served one after another, so this blocks while others are busy ..
+        session = self.connect()
+        pid = session.ping()
+
+        # .. limiting time per command once it's our turn
+        session.connection.settimeout(self.command_timeout)
+        session.on_timeout = lambda: self.restart(pid)
+
+        return session
+
+
+    def stop(self):
+        if os.path.exists(self.socket_path):
+            try:
+                with self.connect() as session:
+                    session.stream.write(json.dumps({'command': 'quit'}) + '\n')
+                    session.stream.flush()
+
+            except OSError:
+                pass
+
+
+class WorkerPool:
+    def __init__(self, size: int, socket_path: str = SOCKET):
+        base, extension = os.path.splitext(socket_path)
+
+        # One worker (= Scribus instance) per thread
+        self.workers = queue.Queue()
+
+        for index in range(size):
+            self.workers.put(Worker('%s-%s%s' % (base, index + 1, extension)))
+
+        self.size = size
+
+
+    def run(self, function, job):
+        # Borrow worker for given job
+        worker = self.workers.get()
+
+        try:
+            try:
+                with worker.session() as session:
+                    return function(session, *job)
+
+            # Retry once on restarted worker
+            except WorkerTimeout:
+                with worker.session() as session:
+                    return function(session, *job)
+
+        finally:
+            self.workers.put(worker)
+
+
+    def map(self, function, jobs: list) -> list:
+        # Run `function(session, *job)` for all jobs, using all workers at once
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(lambda job: self.run(function, job), jobs))
+
+
+    def stop(self):
+        for worker in list(self.workers.queue):
+            worker.stop()
+
+
+def export_pdf(session: Session, sla_file: str, output_file: str, pages: list = None):
+    session.openDoc(os.path.abspath(sla_file))
+    session.exportPDF(os.path.abspath(output_file), pages)
+    session.closeDoc()
+
+
+def export_images(session: Session, sla_file: str, images: list, dpi: int = 72):
+    # Export pages as PNG images, eg [(1, 'page-1.png'), ..]
+    session.openDoc(os.path.abspath(sla_file))
+
+    for page, output_file in images:
+        session.exportImage(os.path.abspath(output_file), page, dpi)
+
+    session.closeDoc()
@@ -0,0 +1,316 @@
+import os
+import gzip
+import json
+import asyncio
+import hashlib
+
+from urllib.parse import unquote, urlsplit
+
+from lib.book import read_books
+from lib.files import find_file, list_files, open_file
+from lib.isbn import parse as parse_isbn
+from lib.issue import slug
+
+
+# Reason phrases of status codes being used
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+}
+
+
+class Response:
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+
+        # Compress once (without timestamp, so that bodies stay the same)
+        self.gzipped = gzip.compress(self.body, 6, mtime=0)
+
+        # Build complete responses upfront (plain & gzip-encoded)
+        self.plain = self.build(self.body)
+        self.encoded = self.build(self.gzipped, 'Content-Encoding: gzip\r\n')
+
+
+    def build(self, body: bytes, extra: str = '') -> bytes:
+        head = (
+            'HTTP/1.1 200 OK\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            'Cache-Control: no-cache\r\n'
+            'Vary: Accept-Encoding\r\n'
+            'ETag: %s\r\n'
+            '%s'
+            'Content-Length: %s\r\n'
+            '\r\n'
+        ) % (self.etag, extra, len(body))
+
+        return head.encode('latin-1') + body
+
+
+def get_state(issue_dir: str) -> list:
+    # Determine state of all files an issue is built from
+    files = [find_file(os.path.join(issue_dir, 'data.json'))]
+
+    for mode in ['src', 'dist']:
+        files += list_files(os.path.join(issue_dir, mode, 'json', '*.json'))
+
+    return [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in files if os.path.isfile(path)]
+
+
+def read_issue(issue_dir: str) -> list:
+    issue = os.path.basename(os.path.normpath(issue_dir))
+
+    # Add publishers (not being part of issue data), preferring processed over raw data
+    publishers = {}
+
+    for json_file in list_files(os.path.join(issue_dir, 'src', 'json', '*.json')) + list_files(os.path.join(issue_dir, 'dist', 'json', '*.json')):
+        for book in read_books(json_file):
+            publishers[parse_isbn(book['ISBN'])] = book['Verlag']
+
+    with open_file(os.path.join(issue_dir, 'data.json'), 'r') as file:
+        data = json.load(file)
+
+    books = []
+
+    for heading, records in data.items():
+        for record in records:
+            books.append(dict(record, issue=issue, category=heading, publisher=publishers.get(parse_isbn(record['isbn']), '')))
+
+    return books
+
+
+def build_responses(issue: str, books: list) -> dict:
+    # Group books by category & publisher
+    groups = {'categories': {}, 'publishers': {}}
+
+    for book in books:
+        groups['categories'].setdefault(slug(book['category']), []).append(book)
+        groups['publishers'].setdefault(slug(book['publisher']), []).append(book)
+
+    responses = {'/issues/' + issue: Response(books)}
+
+    for group, values in groups.items():
+        responses['/issues/%s/%s' % (issue, group)] = Response({value: len(members) for value, members in values.items()})
+
+        for value, members in values.items():
+            responses['/issues/%s/%s/%s' % (issue, group, value)] = Response(members)
+
+    return responses
+
+
+class Archive:
+    def __init__(self, issues_dir: str = 'issues'):
+        self.issues_dir = issues_dir
+
+        # File state, books & responses per issue
+        self.states = {}
+        self.books = {}
+        self.issues = {}
+
+        # Responses for all paths (being replaced as a whole)
+        self.responses = {}
+
+        # Errors per issue (being reported once)
+        self.errors = {}
+
+
+    def reload(self) -> list:
+        # Determine issues with data ..
+        names = sorted(
+            name for name in os.listdir(self.issues_dir)
+            if os.path.isfile(find_file(os.path.join(self.issues_dir, name, 'data.json')))
+        )
+
+        # .. rebuilding those whose files changed
+        changed = []
+
+        for name in names:
+            try:
+                state = get_state(os.path.join(self.issues_dir, name))
+
+                if self.states.get(name) == state:
+                    continue
+
+                books = read_issue(os.path.join(self.issues_dir, name))
+                responses = build_responses(name, books)
+
+            # Keep serving previous responses (eg while files are being written), retrying next time
+            except Exception as error:
+                if self.errors.get(name) != str(error):
+                    print('Reloading %s failed: %s' % (name, error))
+
+                self.errors[name] = str(error)
+
+                continue
+
+            self.books[name] = books
+            self.issues[name] = responses
+            self.states[name] = state
+            self.errors.pop(name, None)
+
+            changed.append(name)
+
+        removed = set(self.states) - set(names)
+
+        for name in removed:
+            del self.states[name], self.books[name], self.issues[name]
+
+        if changed or removed:
+            self.responses = self.build()
+
+        return changed
+
+
+    def build(self) -> dict:
+        responses = {}
+
+        for issue_responses in self.issues.values():
+            responses.update(issue_responses)
+
+        # Overview of all issues
+        responses['/issues'] = Response([{
+            'issue': name,
+            'books': len(books),
+            'categories': sorted({slug(book['category']) for book in books}),
+        } for name, books in self.books.items()])
+
+        # Books per ISBN (across issues)
+        isbns = {}
+
+        for books in self.books.values():
+            for book in books:
+                isbn = parse_isbn(book['isbn'])
+
+                if isbn is not None:
+                    isbns.setdefault(isbn.digits, []).append(book)
+
+        for digits, books in isbns.items():
+            responses['/isbn/' + digits] = Response(books)
+
+        return responses
+
+
+    def get(self, path: str) -> Response:
+        # Accept ISBNs in any format, eg '/isbn/978-3-423-62738-2'
+        if path.startswith('/isbn/'):
+            isbn = parse_isbn(path[6:])
+
+            path = '/isbn/' + isbn.digits if isbn is not None else path
+
+        return self.responses.get(path.rstrip('/') or '/issues')
+
+
+class Server:
+    def __init__(self, archive: Archive, interval: float = 2):
+        self.archive = archive
+
+        # Time (in seconds) between checking files for changes
+        self.interval = interval
+
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+
+                if not request_line:
+                    break
+
+                # Parse request & headers (lowercasing names)
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+
+                except ValueError:
+                    writer.write(self.error(400))
+
+                    break
+
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if line in [b'\r\n', b'\n', b'']:
+                        break
+
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                writer.write(self.respond(method, unquote(urlsplit(target).path), headers))
+
+                # Keep connection open (unless told otherwise)
+                connection = headers.get('connection', '').lower()
+
+                if connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive'):
+                    break
+
+                await writer.drain()
+
+            await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+
+    def respond(self, method: str, path: str, headers: dict) -> bytes:
+        if method not in ['GET', 'HEAD']:
+            return self.error(405)
+
+        response = self.archive.get(path)
+
+        if response is None:
+            return self.error(404)
+
+        # Skip unchanged responses
+        if response.etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return ('HTTP/1.1 304 Not Modified\r\nETag: %s\r\nVary: Accept-Encoding\r\n\r\n' % response.etag).encode('latin-1')
+
+        result = response.encoded if 'gzip' in headers.get('accept-encoding', '') else response.plain
+
+        # Send headers only
+        if method == 'HEAD':
+            return result[:result.index(b'\r\n\r\n') + 4]
+
+        return result
+
+
+    def error(self, status: int) -> bytes:
+        body = json.dumps({'error': REASONS[status]}).encode('utf-8')
+
+        return b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s' % (
+            status, REASONS[status].encode('latin-1'), len(body), body,
+        )
+
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            # Rebuild changed issues without blocking requests
+            changed = await loop.run_in_executor(None, self.archive.reload)
+
+            if changed:
+                print('Reloaded %s' % ', '.join(changed))
+
+
+    async def serve(self, host: str, port: int):
+        self.archive.reload()
+
+        server = await asyncio.start_server(self.handle, host, port)
+
+        print('Serving %s issues on http://%s:%s ..' % (len(self.archive.books), host, port))
+
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch())
+
+
+    def run(self, host: str = '127.0.0.1', port: int = 8000):
+        asyncio.run(self.serve(host, port))
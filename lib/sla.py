@@ -0,0 +1,318 @@
+import os
+import re
+import json
+import hashlib
+
+from lxml import etree
+
+from lib.files import find_file, open_file
+from lib.isbn import parse as parse_isbn
+
+
+# Text elements starting with an ISBN (or EAN), eg '978-3-401-60604-0 - ab 10 Jahren'
+ISBN_PATTERN = re.compile(r'^\s*(\d[\d-]{8,15}[\dX])(?:\s|$)')
+
+
+def parse(sla_file: str):
+    # Parse Scribus template file (decompressing it on the fly, if needed)
+    with open_file(sla_file, 'rb') as file:
+        return etree.parse(file).getroot()
+
+
+def get_text(page_object) -> list:
+    # Extract text of first child element (usually `StoryText`)
+    if len(page_object) == 0:
+        return []
+
+    return [child.attrib['CH'] for child in page_object[0] if child.tag == 'ITEXT']
+
+
+def iter_books(root):
+    seen = set()
+
+    for element in root.iterfind('.//PAGEOBJECT/StoryText/ITEXT'):
+        match = ISBN_PATTERN.match(element.attrib.get('CH', ''))
+
+        # Skip text elements not holding an ISBN ..
+        if match is None:
+            continue
+
+        isbn = parse_isbn(match.group(1))
+
+        # .. or holding an invalid one, as well as ISBNs already indexed
+        if isbn is None or isbn in seen:
+            continue
+
+        seen.add(isbn)
+
+        # Grab text frame
+        page_object = element.getparent().getparent()
+
+        # Extract header
+        # (1) Grab previous 'PAGEOBJECT' element
+        header = []
+        sibling = page_object.getprevious()
+
+        if sibling is not None:
+            header = get_text(sibling)
+
+        # (2) Fix edge cases where header comes AFTER body
+        if not header:
+            sibling = page_object.getnext()
+
+            if sibling is not None:
+                header = get_text(sibling)
+
+        # Provide ISBN, text frames (body & header) as well as their text
+        yield isbn, page_object, sibling if header else None, header, [child.attrib['CH'] for child in element.getparent() if child.tag == 'ITEXT']
+
+
+def index_books(root) -> dict:
+    # Map ISBNs to their page & text, eg {ISBN('978-3-401-60604-0'): {'page': 12, ..}}
+    books = {}
+
+    for isbn, page_object, _, header, body in iter_books(root):
+        books[isbn] = {
+            # Determine page number
+            'page': int(page_object.attrib['OwnPage']) + 1,
+
+            # Extract text
+            'header': header,
+            'body': body,
+        }
+
+    return books
+
+
+def read_index(sla_file: str) -> dict:
+    return index_books(parse(sla_file))
+
+
+# Attributes holding IDs (rather than contents), which Scribus may reassign when saving
+VOLATILE = re.compile(rb'\s(?:ItemID|NEXTITEM|BACKITEM)="[^"]*"')
+
+
+def hash_element(element) -> str:
+    return hashlib.sha256(VOLATILE.sub(b'', etree.tostring(element))).hexdigest()
+
+
+def hash_values(values: list) -> str:
+    return hashlib.sha256(''.join(values).encode('utf-8')).hexdigest()
+
+
+def get_pages(root) -> list:
+    # Grab document pages (in order)
+    return sorted(root.iter('PAGE'), key=lambda page: int(page.attrib['NUM']))
+
+
+def get_label(page_object) -> str:
+    # Describe page object, eg by its text or image
+    text = ''.join(get_text(page_object))
+
+    if text:
+        return text[:60]
+
+    if page_object.attrib.get('PFILE'):
+        return os.path.basename(page_object.attrib['PFILE'])
+
+    return page_object.attrib.get('ANNAME', 'PTYPE=' + page_object.attrib.get('PTYPE', ''))
+
+
+def build_tree(root, base_dir: str) -> dict:
+    # Hash everything affecting all pages (eg colors, styles & master pages)
+    document = hash_values([hash_element(child) for child in root.find('DOCUMENT') if child.tag not in ['PAGE', 'PAGEOBJECT']])
+
+    # Start with page settings (eg size & master page)
+    pages = [{
+        'master': page.attrib.get('MNAM', ''),
+        'settings': hash_element(page),
+        'objects': [],
+    } for page in get_pages(root)]
+
+    # Add page objects (in document order)
+    hashes = {}
+
+    for page_object in root.find('DOCUMENT').iterfind('PAGEOBJECT'):
+        page = int(page_object.attrib['OwnPage'])
+
+        if not 0 <= page < len(pages):
+            continue
+
+        digest = hash_element(page_object)
+
+        # Include state of linked images
+        image_file = page_object.attrib.get('PFILE', '')
+
+        if image_file:
+            image_file = os.path.join(base_dir, image_file)
+
+            if os.path.isfile(image_file):
+                stat = os.stat(image_file)
+                digest = hash_values([digest, '%s:%s:%s' % (image_file, stat.st_size, stat.st_mtime_ns)])
+
+        hashes[page_object] = digest
+        pages[page]['objects'].append([digest, get_label(page_object)])
+
+    for page in pages:
+        page['hash'] = hash_values([page['settings']] + [digest for digest, _ in page['objects']])
+
+    # Assign books to their page & text frames (body & header)
+    books = {}
+
+    for isbn, page_object, header_object, _, _ in iter_books(root):
+        books[str(isbn)] = [int(page_object.attrib['OwnPage']), hashes.get(page_object), hashes.get(header_object)]
+
+    return {
+        'hash': hash_values([document] + [page['hash'] for page in pages]),
+        'document': document,
+        'pages': pages,
+        'books': books,
+    }
+
+
+def hash_section(tree: dict, pages: list) -> str:
+    # Hash section, including everything affecting all pages
+    return hash_values([tree['document']] + [tree['pages'][page]['hash'] for page in pages])
+
+
+def compare_trees(old: dict, new: dict) -> dict:
+    changes = {
+        'document': old['document'] != new['document'],
+        'pages': [],
+        'objects': {},
+        'isbns': [],
+    }
+
+    # Compare top-down, skipping unchanged documents ..
+    if old['hash'] == new['hash']:
+        return changes
+
+    # .. as well as unchanged pages
+    for page in range(max(len(old['pages']), len(new['pages']))):
+        before = old['pages'][page] if page < len(old['pages']) else {'hash': None, 'settings': None, 'objects': []}
+        after = new['pages'][page] if page < len(new['pages']) else {'hash': None, 'settings': None, 'objects': []}
+
+        if before['hash'] == after['hash']:
+            continue
+
+        changes['pages'].append(page)
+
+        # Determine removed & added page objects
+        removed = {digest for digest, _ in before['objects']}
+        added = {digest for digest, _ in after['objects']}
+
+        changes['objects'][page] = {
+            'settings': before['settings'] != after['settings'],
+            'removed': [label for digest, label in before['objects'] if digest not in added],
+            'added': [label for digest, label in after['objects'] if digest not in removed],
+        }
+
+    # Determine books on changed pages (both before & after)
+    pages = set(changes['pages'])
+
+    for books in [old['books'], new['books']]:
+        for isbn, (page, *_) in books.items():
+            if page in pages and isbn not in changes['isbns'] and old['books'].get(isbn) != new['books'].get(isbn):
+                changes['isbns'].append(isbn)
+
+    return changes
+
+
+def get_images(root, base_dir: str) -> list:
+    # Collect image frames, eg [(12, 'dist/images/cover.jpg', 0.24, '399821050'), ..] ('' for empty frames)
+    images = []
+
+    for page_object in root.iter('PAGEOBJECT'):
+        if page_object.attrib.get('PTYPE') != '2' and not page_object.attrib.get('PFILE'):
+            continue
+
+        image_file = page_object.attrib.get('PFILE', '')
+
+        if image_file:
+            image_file = os.path.normpath(os.path.join(base_dir, image_file))
+
+        # Identify frame by its name (if any)
+        frame = page_object.attrib.get('ANNAME') or page_object.attrib.get('ItemID', '')
+
+        images.append((int(page_object.attrib['OwnPage']) + 1, image_file, float(page_object.attrib.get('LOCALSCX', 1)), frame))
+
+    return images
+
+
+def load_tree(sla_file: str, cache_dir: str = '.cache/sla') -> dict:
+    # Cache tree per file (keeping previous revision, see `get_changes`)
+    sla_file = find_file(sla_file)
+    cache_file = os.path.join(cache_dir, hashlib.sha256(os.path.abspath(sla_file).encode('utf-8')).hexdigest()[:16] + '.json')
+
+    stat = os.stat(sla_file)
+    key = [stat.st_mtime_ns, stat.st_size]
+
+    if os.path.isfile(cache_file):
+        with open(cache_file, 'r') as file:
+            cached = json.load(file)
+
+        if cached['key'] == key:
+            return cached['tree']
+
+        os.replace(cache_file, cache_file[:-5] + '.previous.json')
+
+    tree = build_tree(parse(sla_file), os.path.dirname(sla_file))
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with open(cache_file + '.tmp', 'w') as file:
+        json.dump({'file': sla_file, 'key': key, 'tree': tree}, file)
+
+    os.replace(cache_file + '.tmp', cache_file)
+
+    return tree
+
+
+def load_previous_tree(sla_file: str, cache_dir: str = '.cache/sla') -> dict:
+    # Tree of revision before the one loaded most recently (if any)
+    cache_file = os.path.join(cache_dir, hashlib.sha256(os.path.abspath(sla_file).encode('utf-8')).hexdigest()[:16] + '.previous.json')
+
+    if not os.path.isfile(cache_file):
+        return None
+
+    with open(cache_file, 'r') as file:
+        return json.load(file)['tree']
+
+
+def get_changes(sla_file: str, cache_dir: str = '.cache/sla') -> dict:
+    # Compare file to its previous revision (if any), eg
+    # {'document': False, 'pages': [11], 'objects': {11: {..}}, 'isbns': ['978-3-401-60604-0']}
+    tree = load_tree(sla_file, cache_dir)
+    previous = load_previous_tree(sla_file, cache_dir)
+
+    if previous is None:
+        return None
+
+    return compare_trees(previous, tree)
+
+
+def get_sections(tree: dict, names: list) -> list:
+    pages = tree['pages']
+
+    # Determine first page of each section, being either ..
+    # (1) .. pages using section master page
+    starts = [index for index, page in enumerate(pages) if page['master'].startswith('section')]
+
+    # (2) .. pages preceding their category pages (older templates),
+    # eg 'category_autumn' followed by 'category_autumn_toddler'
+    if not starts:
+        starts = [index for index, page in enumerate(pages[:-1]) if pages[index + 1]['master'].startswith(page['master'] + '_')]
+
+    if not starts:
+        return [('document', list(range(len(pages))))]
+
+    # Name sections after categories (in order of appearance)
+    sections = [('intro', list(range(starts[0])))]
+
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(pages)
+        name = names[index] if index < len(names) else 'section-%s' % (index + 1)
+
+        sections.append((name, list(range(start, end))))
+
+    return [(name, numbers) for name, numbers in sections if numbers]
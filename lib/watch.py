@@ -0,0 +1,85 @@
+import os
+import time
+
+from fnmatch import fnmatch
+
+import pyinotify
+
+
+# File events indicating (completed) saves
+MASK = pyinotify.IN_CLOSE_WRITE | pyinotify.IN_MOVED_TO
+
+
+# Runs actions whenever files matching their patterns are saved
+class Watcher(pyinotify.ProcessEvent):
+    def my_init(self, rules: list, delay: float = 0.2):
+        # Pairs of glob pattern & list of callables
+        self.rules = rules
+
+        # Time (in seconds) without events before running actions
+        self.delay = delay
+
+        # Paths of files saved since last run
+        self.pending = set()
+
+
+    def process_default(self, event):
+        self.pending.add(event.pathname)
+
+
+    def match(self, paths: set) -> list:
+        actions = []
+
+        # Collect actions for all saved files (preserving order of rules)
+        for pattern, callables in self.rules:
+            if any(fnmatch(path, os.path.abspath(pattern)) for path in paths):
+                for action in callables:
+                    if action not in actions:
+                        actions.append(action)
+
+        return actions
+
+
+    def dispatch(self):
+        paths, self.pending = self.pending, set()
+
+        for action in self.match(paths):
+            start = time.perf_counter()
+
+            try:
+                action()
+
+                print('%s: done in %.2fs' % (action.__name__, time.perf_counter() - start))
+
+            # Keep watching, even if an action fails
+            except Exception as error:
+                print('%s: failed (%s)' % (action.__name__, error))
+
+
+    def run(self):
+        manager = pyinotify.WatchManager()
+        notifier = pyinotify.Notifier(manager, self, timeout=int(self.delay * 1000))
+
+        # Watch directories of all patterns (if present)
+        for directory in {os.path.dirname(os.path.abspath(pattern)) for pattern, _ in self.rules}:
+            if os.path.isdir(directory):
+                manager.add_watch(directory, MASK)
+
+        try:
+            while True:
+                # Collect events until there are none for a while ..
+                if notifier.check_events():
+                    notifier.read_events()
+                    notifier.process_events()
+
+                    continue
+
+                # .. before running actions at once
+                if self.pending:
+                    self.dispatch()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            notifier.stop()
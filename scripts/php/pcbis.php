@@ -192,21 +192,6 @@ class KNVClient
 
                     $data[] = $set;
 
-                    echo ' done.';
-                    echo "\n";
-
-                    echo 'Downloading cover ..';
-
-                    # Download book cover
-                    # (1) Set download path
-                    $book->setImagePath($this->dist . '/images');
-
-                    # (2) Download image file
-                    if ($book->downloadCover(Butler::slug($book->title())) === false) {
-                        # Add ISBN when download fails
-                        $this->failures['cover'][] = $isbn;
-                    }
-
                     echo ' done.';
                     echo "\n";
                     echo "\n";
@@ -228,8 +213,14 @@ class KNVClient
             # (1) Store dadasets
             $this->jsonStore($data, $this->root . '/json/' . $this->category . '.json', true);
 
-            # (2) Store failed ISBNs
-            $this->jsonStore($this->failures, $this->base . '/meta/failures.json');
+            # (2) Store failed ISBNs, keeping cover downloads (see `fetch_covers` task)
+            $failuresFile = $this->base . '/meta/failures.json';
+
+            if (file_exists($failuresFile)) {
+                $this->failures['cover'] = json_decode(file_get_contents($failuresFile), true)['cover'] ?? [];
+            }
+
+            $this->jsonStore($this->failures, $failuresFile);
         }
 
         if ($this->mode === 'processing') {
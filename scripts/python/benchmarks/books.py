@@ -0,0 +1,78 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Compares memory usage & speed of book records (see `lib/book.py`)
+# with plain dicts, using all JSON files in the archive
+#
+# Usage:
+# python scripts/python/benchmarks/books.py [--repeat 10]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from glob import glob
+from operator import itemgetter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+from lib.book import read_books
+
+parser = argparse.ArgumentParser(
+    description="Compares memory usage & speed of book records with plain dicts"
+)
+
+parser.add_argument(
+    "--repeat", type=int, default=10,
+    help="Loads archive this many times (simulating larger archives)",
+)
+
+
+def read_dicts(json_file):
+    with open(json_file, 'r') as file:
+        return json.load(file)
+
+
+def measure(loader, json_files, repeat):
+    # Load all files (keeping results in memory)
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    books = [book for _ in range(repeat) for json_file in json_files for book in loader(json_file)]
+
+    load_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Group by publisher & sort by author (like summary & mails)
+    start = time.perf_counter()
+
+    publishers = {}
+
+    for book in sorted(books, key=itemgetter('Sortierung')):
+        publishers.setdefault(book['Verlag'], []).append((book['Titel'], book.get('Seitenzahl')))
+
+    iteration_time = time.perf_counter() - start
+
+    return len(books), memory, load_time, iteration_time
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    json_files = sorted(glob('issues/*/src/json/*.json'))
+
+    for name, loader in [('dict', read_dicts), ('Book', read_books)]:
+        count, memory, load_time, iteration_time = measure(loader, json_files, args.repeat)
+
+        print('%-4s: %s books, %.1f MB (%.0f bytes each), loaded in %.2fs, grouped in %.3fs' % (
+            name, count, memory / 1024 ** 2, memory / count, load_time, iteration_time,
+        ))
@@ -0,0 +1,78 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Compares size & parse time of plain and compressed SLA & JSON files
+# (see `lib/files.py`), using all edited templates & JSON files in the archive
+#
+# Usage:
+# python scripts/python/benchmarks/compression.py [--repeat 3]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+from lib.book import read_books
+from lib.files import compress_file, list_files, strip_suffix, zstandard
+from lib.sla import parse
+
+parser = argparse.ArgumentParser(
+    description="Compares size & parse time of plain and compressed SLA & JSON files"
+)
+
+parser.add_argument(
+    "--repeat", type=int, default=3,
+    help="Parses each file this many times (reporting fastest run)",
+)
+
+
+def measure(loader, files, repeat):
+    # Take fastest run (being least affected by other processes)
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        for path in files:
+            loader(path)
+
+        timings.append(time.perf_counter() - start)
+
+    return sum(os.path.getsize(path) for path in files), min(timings)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    methods = ['plain', '.gz'] + (['.zst'] if zstandard is not None else [])
+
+    for name, loader, pattern in [
+        ('SLA', parse, 'issues/*/dist/templates/edited.sla'),
+        ('JSON', read_books, 'issues/*/*/json/*.json'),
+    ]:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Copy files, decompressing them if needed
+            files = []
+
+            for index, path in enumerate(list_files(pattern)):
+                copy = os.path.join(temp_dir, '%03d-%s' % (index, os.path.basename(path)))
+                shutil.copyfile(path, copy)
+
+                files.append(compress_file(copy, '') if copy != strip_suffix(copy) else copy)
+
+            for method in methods:
+                if method != 'plain':
+                    files = [compress_file(path, method) for path in files]
+
+                size, timing = measure(loader, files, args.repeat)
+
+                print('%-4s (%-5s): %s files, %.1f MB, parsed in %.2fs' % (name, method, len(files), size / 1024 ** 2, timing))
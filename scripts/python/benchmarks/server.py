@@ -0,0 +1,114 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Load-tests query service (see `scripts/python/serve_issues.py`),
+# requesting all of its endpoints over keep-alive connections
+#
+# Usage:
+# python scripts/python/benchmarks/server.py [--url http://127.0.0.1:8000] [--requests 20000] [--connections 16]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+from lib.covers import ConnectionPool
+
+parser = argparse.ArgumentParser(
+    description="Load-tests query service"
+)
+
+parser.add_argument(
+    "--url", default="http://127.0.0.1:8000",
+    help="Requests service under specified address",
+)
+
+parser.add_argument(
+    "--requests", type=int, default=20000,
+    help="Sends this many requests in total",
+)
+
+parser.add_argument(
+    "--connections", type=int, default=16,
+    help="Sends requests over this many connections at once",
+)
+
+parser.add_argument(
+    "--etag", action="store_true",
+    help="Sends ETags (receiving '304 Not Modified' responses)",
+)
+
+
+async def get_paths(pool, url):
+    # Collect all endpoints, eg '/issues/2021_02/publishers/aladin'
+    _, _, body = await pool.request(url + '/issues')
+    paths = ['/issues']
+
+    for issue in json.loads(body):
+        paths.append('/issues/' + issue['issue'])
+
+        for group in ['categories', 'publishers']:
+            _, _, body = await pool.request('%s/issues/%s/%s' % (url, issue['issue'], group))
+            paths += ['/issues/%s/%s/%s' % (issue['issue'], group, value) for value in json.loads(body)]
+
+        _, _, body = await pool.request(url + '/issues/' + issue['issue'])
+        paths += ['/isbn/' + book['isbn'] for book in json.loads(body)]
+
+    return paths
+
+
+async def run(url, total, connections, send_etag):
+    pool = ConnectionPool(connections)
+    paths = await get_paths(pool, url)
+
+    # Remember ETags (if needed)
+    etags = {}
+
+    if send_etag:
+        for path in paths:
+            _, headers, _ = await pool.request(url + path)
+            etags[path] = headers['etag']
+
+    timings = []
+    statuses = {}
+
+    async def worker(offset):
+        for index in range(offset, total, connections):
+            path = paths[index % len(paths)]
+            headers = {'Accept-Encoding': 'gzip'}
+
+            if path in etags:
+                headers['If-None-Match'] = etags[path]
+
+            start = time.perf_counter()
+            status, _, _ = await pool.request(url + path, headers)
+            timings.append(time.perf_counter() - start)
+
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(offset) for offset in range(connections)])
+    duration = time.perf_counter() - start
+
+    pool.close()
+
+    timings.sort()
+
+    print('%s requests (%s paths) in %.2fs: %.0f requests/s' % (total, len(paths), duration, total / duration))
+    print('Latency: p50 %.2fms, p99 %.2fms' % (timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.99)] * 1000))
+    print('Status codes: %s' % ', '.join('%s (%s)' % item for item in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url.rstrip('/'), args.requests, args.connections, args.etag))
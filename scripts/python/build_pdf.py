@@ -7,16 +7,24 @@
 # For more information,
 # see https://wiki.scribus.net/canvas/Automatic_Scripter_Commands_list
 #
+# Requires a running Scribus worker (started on demand),
+# see `scribus_worker.py`
+#
 # Usage:
-# scribus -g -py pdf-gen.py --input input_file.sla --output output_file.pdf
+# python build_pdf.py --input input_file.sla --output output_file.pdf
 #
 # License: MIT
 # (c) Martin Folkers
 ##
 
-import scribus
+import os
+import sys
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.scribus import Worker
+
 parser = argparse.ArgumentParser(
     description="Generates PDF file from a given SLA file - quick & dirty"
 )
@@ -34,16 +42,14 @@ parser.add_argument(
 if __name__ == "__main__":
     args = parser.parse_args()
 
-    # Generating PDF
-    scribus.openDoc(args.input)
-    pdf = scribus.PDFfile()
+    with Worker().session() as scribus:
+        # Generating PDF
+        scribus.openDoc(os.path.abspath(args.input))
 
-    file_name = scribus.getDocName()[:-3] + 'pdf'
+        file_name = scribus.getDocName()[:-3] + 'pdf'
 
-    if args.output is not None:
-        file_name = args.output
+        if args.output is not None:
+            file_name = os.path.abspath(args.output)
 
-    pdf.thumbnails = 1
-    pdf.file = file_name
-    pdf.save()
-    scribus.closeDoc()
+        scribus.exportPDF(file_name)
+        scribus.closeDoc()
@@ -0,0 +1,159 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Builds phase two of an archived issue both serially & in parallel
+# (each in its own working copy), comparing outputs byte for byte
+#
+# Usage:
+# python scripts/python/check_parallel.py 2021_02 [--jobs 8] [--keep]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import time
+import shutil
+import filecmp
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+# Leftovers of local builds (not being shared with working copies)
+SKIP = ['.cache', '.doit.db', '.doit.db.bak', '.doit.db.dat', '.doit.db.dir', '.git', 'issues']
+
+# Phase one tasks (whose targets are taken from archive as they are)
+PHASE_ONE = ['ingest_csv', 'fetch_api', 'fetch_covers', 'check_data']
+
+# Build directories (see `new_issue.bash`)
+DIST_DIRS = ['dist/json', 'dist/images', 'dist/documents/pdf', 'dist/documents/mails', 'dist/templates/partials']
+
+# Fixed build time (so that outputs don't differ by timestamps)
+EPOCH = '1600000000'
+
+parser = argparse.ArgumentParser(
+    description="Compares serial & parallel builds of phase two"
+)
+
+parser.add_argument(
+    "issue",
+    help="Archived issue, eg '2021_02'",
+)
+
+parser.add_argument(
+    "--jobs", type=int, default=os.cpu_count() or 1,
+    help="Number of processes used for parallel build",
+)
+
+parser.add_argument(
+    "--keep", action="store_true",
+    help="Keeps working copies (eg for inspecting differences)",
+)
+
+
+def prepare(work_dir: str, issue: str):
+    # Link everything but issues ..
+    for name in os.listdir(ROOT):
+        if name not in SKIP:
+            os.symlink(os.path.abspath(os.path.join(ROOT, name)), os.path.join(work_dir, name))
+
+    # .. linking earlier issues (being read only) ..
+    os.makedirs(os.path.join(work_dir, 'issues'))
+
+    for name in os.listdir(os.path.join(ROOT, 'issues')):
+        if name != issue:
+            os.symlink(os.path.abspath(os.path.join(ROOT, 'issues', name)), os.path.join(work_dir, 'issues', name))
+
+    # .. and copying given issue, without any build results
+    issue_dir = os.path.join(work_dir, 'issues', issue)
+
+    shutil.copytree(
+        os.path.join(ROOT, 'issues', issue),
+        issue_dir,
+        ignore=lambda path, names: ['dist'] if os.path.basename(path) == issue else [],
+    )
+
+    for dist_dir in DIST_DIRS:
+        os.makedirs(os.path.join(issue_dir, dist_dir))
+
+
+def doit(work_dir: str, issue: str, *args) -> float:
+    command = [sys.executable, '-m', 'doit'] + list(args) + ['issue=' + issue, 'epoch=' + EPOCH]
+
+    start = time.perf_counter()
+    subprocess.run(command, cwd=work_dir, check=True)
+
+    return time.perf_counter() - start
+
+
+def build(work_dir: str, issue: str, jobs: int) -> float:
+    prepare(work_dir, issue)
+
+    # Mark phase one as done (instead of fetching data again) ..
+    doit(work_dir, issue, 'reset-dep', *PHASE_ONE)
+
+    # .. building phase two only
+    return doit(work_dir, issue, 'run', '-n', str(jobs), 'phase_two')
+
+
+def list_outputs(dist_dir: str) -> set:
+    files = set()
+
+    for path, _, names in os.walk(dist_dir):
+        files.update(os.path.relpath(os.path.join(path, name), dist_dir) for name in names)
+
+    return files
+
+
+def compare(serial_dir: str, parallel_dir: str) -> list:
+    serial_files = list_outputs(serial_dir)
+    parallel_files = list_outputs(parallel_dir)
+
+    differences = ['%s: serial only' % path for path in sorted(serial_files - parallel_files)]
+    differences += ['%s: parallel only' % path for path in sorted(parallel_files - serial_files)]
+
+    for path in sorted(serial_files & parallel_files):
+        if not filecmp.cmp(os.path.join(serial_dir, path), os.path.join(parallel_dir, path), shallow=False):
+            differences.append('%s: contents differ' % path)
+
+    return differences
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='check-parallel-')
+
+    try:
+        timings = {}
+
+        for mode, jobs in [('serial', 1), ('parallel', args.jobs)]:
+            os.makedirs(os.path.join(work_dir, mode))
+            timings[mode] = build(os.path.join(work_dir, mode), args.issue, jobs)
+
+        differences = compare(*[os.path.join(work_dir, mode, 'issues', args.issue, 'dist') for mode in timings])
+
+        for difference in differences:
+            print(difference)
+
+        print('Serial: %.1fs, parallel (%s jobs): %.1fs (%.2fx)' % (
+            timings['serial'],
+            args.jobs,
+            timings['parallel'],
+            timings['serial'] / timings['parallel'],
+        ))
+
+        print('Outputs differ!' if differences else 'Outputs are identical')
+
+    finally:
+        if args.keep:
+            print('Working copies: %s' % work_dir)
+
+        else:
+            shutil.rmtree(work_dir)
+
+    sys.exit(1 if differences else 0)
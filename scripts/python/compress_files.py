@@ -0,0 +1,75 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Stores archived templates compressed (or plain again),
+# being read & written transparently by the pipeline (see `lib/files.py`)
+#
+# Usage:
+# python scripts/python/compress_files.py [issues/2019_02 ..] [--method gz|zst|plain]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import argparse
+
+from glob import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.files import compress_file, get_suffix, list_files
+
+# Files being compressed per issue
+# (base templates & partials are left alone, since they're copied & generated by other tools,
+# as are JSON files, since `scripts/php/pcbis.php` and doit targets expect them to be plain)
+PATTERNS = [
+    'dist/templates/edited.sla',
+]
+
+# Files being decompressed as well (if compressed before)
+LEGACY_PATTERNS = [
+    'src/json/*.json',
+    'dist/json/*.json',
+]
+
+parser = argparse.ArgumentParser(
+    description="Stores archived templates compressed (or plain again)"
+)
+
+parser.add_argument(
+    "issues", nargs="*",
+    help="Processes issue directories (defaults to all of them)",
+)
+
+parser.add_argument(
+    "--method", default="gz", choices=["gz", "zst", "plain"],
+    help="Compresses with gzip or zstandard, or decompresses files",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    suffix = '' if args.method == 'plain' else '.' + args.method
+
+    size_before = size_after = 0
+
+    for issue_dir in args.issues or sorted(glob('issues/*')):
+        for pattern in PATTERNS + (LEGACY_PATTERNS if args.method == 'plain' else []):
+            for path in list_files(os.path.join(issue_dir, pattern)):
+                if get_suffix(path) == suffix:
+                    continue
+
+                size_before += os.path.getsize(path)
+                path = compress_file(path, suffix)
+                size_after += os.path.getsize(path)
+
+                print(path)
+
+    if size_before:
+        print('%.1f MB => %.1f MB' % (size_before / 1024 ** 2, size_after / 1024 ** 2))
+
+    else:
+        print('Nothing to do!')
@@ -7,17 +7,24 @@
 # For more information,
 # see https://wiki.scribus.net/canvas/Automatic_Scripter_Commands_list
 #
+# Requires a running Scribus worker (started on demand),
+# see `scribus_worker.py`
+#
 # Usage:
-# scribus -g -py delete-page.py base_file.sla --page INT
+# python delete_page.py base_file.sla --page INT
 #
 # License: MIT
 # (c) Martin Folkers
 ##
 
 import os
-import scribus
+import sys
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.scribus import Worker
+
 parser = argparse.ArgumentParser(
     description="Deletes page from an `.sla` file"
 )
@@ -38,12 +45,13 @@ parser.add_argument(
 if __name__ == "__main__":
     args = parser.parse_args()
 
-    # Open document
-    scribus.openDoc(os.path.abspath(args.file))
+    with Worker().session() as scribus:
+        # Open document
+        scribus.openDoc(os.path.abspath(args.file))
 
-    # Delete page
-    scribus.deletePage(args.page)
+        # Delete page
+        scribus.deletePage(args.page)
 
-    # Save & close document
-    scribus.saveDoc()
-    scribus.closeDoc()
+        # Save & close document
+        scribus.saveDoc()
+        scribus.closeDoc()
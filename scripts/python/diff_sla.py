@@ -0,0 +1,74 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Shows what changed between two SLA files,
+# or since the previous revision of a single SLA file
+#
+# Usage:
+# python diff_sla.py --input new.sla [--previous old.sla]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.sla import compare_trees, load_previous_tree, load_tree
+
+parser = argparse.ArgumentParser(
+    description="Shows what changed between two SLA files"
+)
+
+parser.add_argument(
+    "--input",
+    help="Takes SLA file under specified path",
+)
+
+parser.add_argument(
+    "--previous",
+    help="Compares to SLA file under specified path (defaults to previous revision)",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    tree = load_tree(args.input)
+
+    if args.previous is not None:
+        previous = load_tree(args.previous)
+
+    else:
+        previous = load_previous_tree(args.input)
+
+        if previous is None:
+            sys.exit('No previous revision of "%s" known yet' % args.input)
+
+    changes = compare_trees(previous, tree)
+
+    if changes['document']:
+        print('Document settings changed (eg colors, styles or master pages)')
+
+    for page in changes['pages']:
+        objects = changes['objects'][page]
+
+        print('Page %s:' % (page + 1))
+
+        if objects['settings']:
+            print('  ~ page settings')
+
+        for label in objects['removed']:
+            print('  - %s' % label)
+
+        for label in objects['added']:
+            print('  + %s' % label)
+
+    if changes['isbns']:
+        print('Books: %s' % ', '.join(changes['isbns']))
+
+    if not changes['document'] and not changes['pages']:
+        print('No changes found!')
@@ -0,0 +1,65 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Finds same works (eg hardcover, paperback & audiobook)
+# across all issues, using their author, title & series
+#
+# Usage:
+# python find_duplicates.py --output duplicates.json [--threshold 0.85] [issues/2020_01 ..]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import json
+import argparse
+
+from glob import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.duplicates import THRESHOLD, find_clusters, read_issue
+
+parser = argparse.ArgumentParser(
+    description="Finds same works across all issues"
+)
+
+parser.add_argument(
+    "issues", nargs="*",
+    help="Checks specified issue directories (defaults to all)",
+)
+
+parser.add_argument(
+    "--output",
+    help="Creates JSON file under specified path",
+)
+
+parser.add_argument(
+    "--threshold", type=float, default=THRESHOLD,
+    help="Reports titles at least this similar",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    issue_dirs = args.issues or sorted(glob('issues/*'))
+
+    books = []
+
+    for issue_dir in issue_dirs:
+        books += read_issue(issue_dir)
+
+    clusters = find_clusters(books, args.threshold)
+
+    # Print summary (most certain first)
+    for cluster in sorted(clusters, key=lambda cluster: -cluster['confidence']):
+        print('%.2f: %s' % (cluster['confidence'], ' & '.join('%s (%s, %s)' % (book['ISBN'], book['Ausgabe'], book['Kategorie']) for book in cluster['books'])))
+
+    print('%s clusters in %s books' % (len(clusters), len(books)))
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(clusters, file, ensure_ascii=False, indent=4)
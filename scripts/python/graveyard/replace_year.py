@@ -16,7 +16,10 @@ import re
 import sys
 import argparse
 import datetime
-import fileinput
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+from lib.files import find_file, get_temp_file, open_file
 
 parser = argparse.ArgumentParser(
     description="Replaces all instances in a file with the current year"
@@ -33,15 +36,17 @@ parser.add_argument(
 
 
 def replace(file_name, pattern):
-    path = os.path.abspath(file_name)
-    file = fileinput.input(path, inplace=True)
+    path = find_file(os.path.abspath(file_name))
+    temp_file = get_temp_file(path)
 
     now = datetime.datetime.now()
 
-    for line in file:
-        line = re.sub(pattern, str(now.year), line)
-        sys.stdout.write(line)
-    file.close()
+    # Works with compressed files, too
+    with open_file(path, 'r') as source, open_file(temp_file, 'w') as target:
+        for line in source:
+            target.write(re.sub(pattern, str(now.year), line))
+
+    os.replace(temp_file, path)
 
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ import pandas  # read_csv, concat, DataFrame
 from lxml import etree
 from operator import itemgetter
 
+from lib.files import open_file
+
 
 def get_page_number(data, isbn):
     for element in data:
@@ -57,7 +59,9 @@ def swap_name(name):
 
 def get_booklist(input_file):
     # Parsing Scribus template file
-    tree = etree.parse(input_file)
+    with open_file(input_file, 'rb') as file:
+        tree = etree.parse(file)
+
     root = tree.getroot()
     data = root.findall('.//PAGEOBJECT/StoryText/ITEXT')
 
@@ -7,17 +7,24 @@
 # For more information,
 # see https://wiki.scribus.net/canvas/Automatic_Scripter_Commands_list
 #
+# Requires a running Scribus worker (started on demand),
+# see `scribus_worker.py`
+#
 # Usage:
-# scribus -g -py import-pages.py base_file.sla import_pages.sla
+# python import_pages.py base_file.sla import_pages.sla
 #
 # License: MIT
 # (c) Martin Folkers
 ##
 
 import os
-import scribus
+import sys
 import argparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.scribus import Worker
+
 parser = argparse.ArgumentParser(
     description="Imports all pages of an `.sla` file into another one"
 )
@@ -51,7 +58,7 @@ parser.add_argument(
 )
 
 
-def get_pages_range(sla_file):
+def get_pages_range(scribus, sla_file):
     scribus.openDoc(sla_file)
     page_count = range(1, scribus.pageCount() + 1)
     scribus.closeDoc()
@@ -68,7 +75,6 @@ if __name__ == "__main__":
     page_number = args.page - 1
     insert_position = 0 if args.before is True else 1  # 0 = before; 1 = after
     master_page = args.masterpage
-    total_pages = get_pages_range(import_file)
 
     # Output path
     output_file = args.output
@@ -76,22 +82,25 @@ if __name__ == "__main__":
     if output_file is not None:
         output_file = os.path.abspath(args.output)
 
-    # Importing `import_file`
-    scribus.openDoc(base_file)
-    scribus.importPage(
-        import_file, total_pages, 1, insert_position, page_number
-    )
+    with Worker().session() as scribus:
+        total_pages = get_pages_range(scribus, import_file)
 
-    # Applying masterpage(s)
-    if master_page is not None:
-        for number in range(page_number + 2, page_number + len(total_pages) + 2):
-            scribus.applyMasterPage(master_page, number)
+        # Importing `import_file`
+        scribus.openDoc(base_file)
+        scribus.importPage(
+            import_file, total_pages, 1, insert_position, page_number
+        )
 
-    # Either overwriting `base_file` ..
-    if output_file is None:
-        scribus.saveDoc()
-    # .. or creating new `output` file (requires `--output`)
-    else:
-        scribus.saveDocAs(output_file)
+        # Applying masterpage(s)
+        if master_page is not None:
+            for number in range(page_number + 2, page_number + len(total_pages) + 2):
+                scribus.applyMasterPage(master_page, number)
 
-    scribus.closeDoc()
+        # Either overwriting `base_file` ..
+        if output_file is None:
+            scribus.saveDoc()
+        # .. or creating new `output` file (requires `--output`)
+        else:
+            scribus.saveDocAs(output_file)
+
+        scribus.closeDoc()
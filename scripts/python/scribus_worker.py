@@ -0,0 +1,148 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Serves Scribus commands over a local socket
+#
+# Keeps one headless Scribus instance running, so that scripts
+# don't have to pay for its startup time over and over again
+#
+# Each connection is a session, being handled one after another:
+# Commands are sent as JSON objects (one per line), eg
+# {"command": "openDoc", "args": ["base.sla"]}
+# and answered likewise, eg
+# {"ok": true, "result": null}
+#
+# For more information,
+# see https://wiki.scribus.net/canvas/Automatic_Scripter_Commands_list
+#
+# Usage:
+# scribus -g -ns -py scribus_worker.py --socket path/to/scribus.sock
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import json
+import socket
+import scribus
+import argparse
+
+parser = argparse.ArgumentParser(
+    description="Serves Scribus commands over a local socket"
+)
+
+parser.add_argument(
+    "--socket",
+    help="Listens on socket under specified path",
+)
+
+parser.add_argument(
+    "--timeout", type=int, default=600,
+    help="Exits after being idle for this many seconds",
+)
+
+
+def export_pdf(output_file, pages=None, thumbnails=1):
+    pdf = scribus.PDFfile()
+    pdf.thumbnails = thumbnails
+    pdf.file = output_file
+
+    # Export selected pages only (if specified)
+    if pages is not None:
+        pdf.pages = list(pages)
+
+    pdf.save()
+
+
+def export_image(output_file, page, dpi=72, quality=100):
+    scribus.gotoPage(page)
+
+    image = scribus.ImageExport()
+    image.type = 'PNG'
+    image.dpi = dpi
+    image.scale = 100
+    image.quality = quality
+    image.saveAs(output_file)
+
+
+def import_page(import_file, pages, create, where, where_to):
+    scribus.importPage(import_file, tuple(pages), create, where, where_to)
+
+
+# Available commands
+commands = {
+    'ping': lambda: os.getpid(),
+    'openDoc': scribus.openDoc,
+    'closeDoc': scribus.closeDoc,
+    'saveDoc': scribus.saveDoc,
+    'saveDocAs': scribus.saveDocAs,
+    'getDocName': scribus.getDocName,
+    'pageCount': scribus.pageCount,
+    'deletePage': scribus.deletePage,
+    'importPage': import_page,
+    'applyMasterPage': scribus.applyMasterPage,
+    'exportPDF': export_pdf,
+    'exportImage': export_image,
+}
+
+
+def handle(connection):
+    stream = connection.makefile('rw')
+
+    for line in stream:
+        request = json.loads(line)
+
+        if request['command'] == 'quit':
+            return False
+
+        try:
+            result = commands[request['command']](*request.get('args', []))
+            response = {'ok': True, 'result': result}
+
+        except Exception as error:
+            response = {'ok': False, 'error': '%s: %s' % (type(error).__name__, error)}
+
+        stream.write(json.dumps(response) + '\n')
+        stream.flush()
+
+    return True
+
+
+def close_all():
+    # Close documents left open by broken sessions
+    while scribus.haveDoc():
+        scribus.closeDoc()
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    # Remove stale socket
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(args.socket)
+    server.listen(16)
+    server.settimeout(args.timeout)
+
+    running = True
+
+    # Handle sessions one by one
+    while running:
+        try:
+            connection, _ = server.accept()
+
+        # Exit when idle
+        except socket.timeout:
+            break
+
+        with connection:
+            running = handle(connection)
+
+        close_all()
+
+    server.close()
+    os.remove(args.socket)
@@ -0,0 +1,55 @@
+#! /usr/bin/python
+# ~*~ coding=utf-8 ~*~
+
+##
+# Serves issue data (read-only) over HTTP, reloading issues whose files changed
+#
+# Endpoints:
+# /issues                              Overview of all issues
+# /issues/2021_02                      All books of an issue
+# /issues/2021_02/categories[/slug]    Books per category
+# /issues/2021_02/publishers[/slug]    Books per publisher
+# /isbn/978-3-423-62738-2              Books with given ISBN (across issues)
+#
+# Usage:
+# python scripts/python/serve_issues.py [--host 127.0.0.1] [--port 8000]
+#
+# License: MIT
+# (c) Martin Folkers
+##
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from lib.server import Archive, Server
+
+parser = argparse.ArgumentParser(
+    description="Serves issue data (read-only) over HTTP"
+)
+
+parser.add_argument(
+    "--host", default="127.0.0.1",
+    help="Listens on specified address",
+)
+
+parser.add_argument(
+    "--port", type=int, default=8000,
+    help="Listens on specified port",
+)
+
+parser.add_argument(
+    "--interval", type=float, default=2,
+    help="Checks issue files for changes every so many seconds",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    try:
+        Server(Archive(), args.interval).run(args.host, args.port)
+
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.covers import CoverDownloader
+
+# Cover images served by stand-in server (per ISBN digits)
+IMAGES = {
+    '9783423627382': b'\xff\xd8cover-1',
+    '9783401606040': b'\xff\xd8cover-2',
+    '9783407812345': b'\xff\xd8cover-3',
+}
+
+# ISBN whose response is cut off
+TRUNCATED = '9783401606040'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Requests (path & whether they were conditional)
+    requests = []
+
+
+    def do_GET(self):
+        digits = self.path.rsplit('/', 1)[-1]
+        self.requests.append((digits, 'If-None-Match' in self.headers))
+
+        if digits == TRUNCATED:
+            # Announce more bytes than being sent, then hang up
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            self.wfile.write(b'\xff\xd8')
+            self.close_connection = True
+
+            return
+
+        etag = '"%s"' % digits
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(IMAGES[digits])))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(IMAGES[digits])
+
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    yield 'http://127.0.0.1:%s/covers/{isbn}' % httpd.server_address[1]
+
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get_covers(image_dir) -> dict:
+    return {'isbn-%s' % index: (digits, str(image_dir / ('%s.jpg' % digits))) for index, digits in enumerate(IMAGES)}
+
+
+def test_truncated_response_fails_single_isbn(server, tmp_path):
+    covers = get_covers(tmp_path / 'images')
+    downloader = CoverDownloader(str(tmp_path / 'covers.json'), str(tmp_path / 'failures.json'), server, 2)
+
+    failed = downloader.run(covers)
+
+    # Only truncated cover failed, all others were downloaded
+    assert failed == ['isbn-1']
+
+    for isbn, (digits, image_file) in covers.items():
+        if digits != TRUNCATED:
+            with open(image_file, 'rb') as file:
+                assert file.read() == IMAGES[digits]
+
+    assert not os.path.isfile(covers['isbn-1'][1])
+
+    with open(tmp_path / 'failures.json') as file:
+        assert json.load(file)['cover'] == ['isbn-1']
+
+
+def test_unchanged_covers_are_not_downloaded_again(server, tmp_path):
+    covers = get_covers(tmp_path / 'images')
+    downloader = CoverDownloader(str(tmp_path / 'covers.json'), str(tmp_path / 'failures.json'), server, 2)
+
+    downloader.run(covers)
+    Handler.requests = []
+
+    downloader.run(covers)
+
+    assert {digits for digits, conditional in Handler.requests if conditional} == set(IMAGES) - {TRUNCATED}
+
+
+def test_resume_retries_failed_isbns_only(server, tmp_path):
+    covers = get_covers(tmp_path / 'images')
+    downloader = CoverDownloader(str(tmp_path / 'covers.json'), str(tmp_path / 'failures.json'), server, 2)
+
+    downloader.run(covers)
+    Handler.requests = []
+
+    assert downloader.run(covers, resume=True) == ['isbn-1']
+    assert {digits for digits, _ in Handler.requests} == {TRUNCATED}
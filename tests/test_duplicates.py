@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.duplicates import THRESHOLD, compare, find_clusters, get_key
+
+
+def get_book(isbn: str, title: str, **series) -> dict:
+    return dict({'ISBN': isbn, 'Titel': title, 'Sortierung': 'Auer, Margit'}, **series)
+
+
+def test_calendars_are_not_duplicates():
+    novel = get_key(get_book('978-3-551-65271-1', 'Die Schule der magischen Tiere'))
+    jokes = get_key(get_book('978-3-551-65105-1', 'Die Schule der magischen Tiere - Witze!.'))
+    calendar = get_key(get_book('4250809648095', 'Schule der magischen Tiere 2022.'))
+
+    assert compare(novel, calendar) == 0.0
+    assert compare(jokes, calendar) == 0.0
+
+
+def test_unnumbered_titles_score_lower():
+    novel = get_key(get_book('978-3-551-65271-1', 'Die Schule der magischen Tiere'))
+    jokes = get_key(get_book('978-3-551-65105-1', 'Die Schule der magischen Tiere - Witze!.'))
+    volume = get_key(get_book('978-3-551-65362-8', 'Die Schule der magischen Tiere 12'))
+
+    assert compare(novel, volume) >= THRESHOLD
+    assert compare(jokes, volume) < THRESHOLD < compare(novel, jokes)
+
+
+def test_series_volumes_match_unnumbered_titles():
+    clusters = find_clusters([
+        get_book('978-3-7855-8406-4', 'Nils Holgersson.', Reihe='Klassiker einfach lesen', Band='1'),
+        get_book('978-3-401-71726-5', 'Nils Holgersson.'),
+    ])
+
+    assert [len(cluster['books']) for cluster in clusters] == [2]
@@ -0,0 +1,68 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.files import open_file, replace_file, write_file
+
+# Modification time of existing files (well in the past)
+MTIME = 1600000000
+
+
+def create_file(path, contents: str):
+    with open_file(str(path), 'w') as file:
+        file.write(contents)
+
+    os.utime(path, (MTIME, MTIME))
+
+
+def read_file(path) -> str:
+    with open_file(str(path), 'r') as file:
+        return file.read()
+
+
+def test_write_file_keeps_identical_files(tmp_path):
+    for name in ['summary.txt', 'data.json.gz']:
+        path = tmp_path / name
+        create_file(path, 'Sasja')
+
+        assert write_file(str(path), 'Sasja') is False
+        assert os.path.getmtime(path) == MTIME
+
+
+def test_write_file_writes_changed_files(tmp_path):
+    for name in ['summary.txt', 'data.json.gz']:
+        path = tmp_path / name
+        create_file(path, 'Sasja')
+
+        assert write_file(str(path), 'Sasja & Co.') is True
+        assert read_file(path) == 'Sasja & Co.'
+        assert os.path.getmtime(path) != MTIME
+
+    # Leaving no temporary files behind
+    assert sorted(os.listdir(tmp_path)) == ['data.json.gz', 'summary.txt']
+
+
+def test_write_file_creates_missing_files(tmp_path):
+    assert write_file(str(tmp_path / 'summary.txt'), 'Sasja') is True
+    assert read_file(tmp_path / 'summary.txt') == 'Sasja'
+
+
+def test_replace_file_keeps_identical_files(tmp_path):
+    create_file(tmp_path / 'mail.html', '<p>Sasja</p>')
+    create_file(tmp_path / 'mail.html.tmp', '<p>Sasja</p>')
+
+    assert replace_file(str(tmp_path / 'mail.html.tmp'), str(tmp_path / 'mail.html')) is False
+    assert os.path.getmtime(tmp_path / 'mail.html') == MTIME
+
+    # Discarding temporary file
+    assert os.listdir(tmp_path) == ['mail.html']
+
+
+def test_replace_file_writes_changed_files(tmp_path):
+    create_file(tmp_path / 'mail.html', '<p>Sasja</p>')
+    create_file(tmp_path / 'mail.html.tmp', '<p>Sasja & Co.</p>')
+
+    assert replace_file(str(tmp_path / 'mail.html.tmp'), str(tmp_path / 'mail.html')) is True
+    assert read_file(tmp_path / 'mail.html') == '<p>Sasja & Co.</p>'
+    assert os.listdir(tmp_path) == ['mail.html']
@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.knv import load_csv_files
+
+# Export rows (per category)
+ROWS = {
+    'ab6': '"Lagerlöf, Selma";"Nils Holgersson.";"Arena";"978-3-401-71726-5";"GEB";"9.00 EUR";"15";"30.0";"305 g";" 2021;72 S.;212.00 mm;ab 7 J.;";"240";""\n',
+    'ab8': '"Vorbach, Britta";"Mutige Menschen.";"Duden";"978-3-411-78003-7";"GEB";"8.00 EUR";"";"30.0";"326 g";" 2021;64 S.;240 mm;ab 8 J.;";"240";""\n',
+}
+
+
+def write_exports(csv_dir, categories: list) -> list:
+    os.makedirs(csv_dir, exist_ok=True)
+
+    for category in categories:
+        with open(csv_dir / (category + '.csv'), 'w', encoding='latin-1') as file:
+            file.write(ROWS[category])
+
+    return [str(csv_dir / (category + '.csv')) for category in categories]
+
+
+def test_cache_is_used_for_unchanged_exports(tmp_path):
+    csv_files = write_exports(tmp_path / 'csv', ['ab6', 'ab8'])
+    cache_file = str(tmp_path / 'books.pickle')
+
+    load_csv_files(csv_files, cache_file)
+    mtime = os.path.getmtime(cache_file)
+
+    assert len(load_csv_files(csv_files, cache_file)) == 2
+    assert os.path.getmtime(cache_file) == mtime
+
+
+def test_cache_is_invalidated_by_removed_exports(tmp_path):
+    csv_files = write_exports(tmp_path / 'csv', ['ab6', 'ab8'])
+    cache_file = str(tmp_path / 'books.pickle')
+
+    load_csv_files(csv_files, cache_file)
+
+    # Remove category (cache still being newer than remaining exports)
+    os.remove(csv_files[1])
+
+    data = load_csv_files(csv_files[:1], cache_file)
+
+    assert list(data['Kategorie']) == ['ab6']
+
+
+def test_cache_is_invalidated_by_renamed_exports(tmp_path):
+    csv_files = write_exports(tmp_path / 'csv', ['ab6'])
+    cache_file = str(tmp_path / 'books.pickle')
+
+    load_csv_files(csv_files, cache_file)
+
+    renamed_file = str(tmp_path / 'csv' / 'ab8.csv')
+    os.rename(csv_files[0], renamed_file)
+
+    data = load_csv_files([renamed_file], cache_file)
+
+    assert list(data['Kategorie']) == ['ab8']
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.scribus import Worker, WorkerTimeout
+
+# Stand-in worker, answering pings but hanging on any other command
+STAND_IN = '''
+import os, sys, json, time, socket
+
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(sys.argv[1])
+server.listen(16)
+
+while True:
+    connection, _ = server.accept()
+    stream = connection.makefile('rw')
+
+    for line in stream:
+        if json.loads(line)['command'] != 'ping':
+            time.sleep(3600)
+
+        stream.write(json.dumps({'ok': True, 'result': os.getpid()}) + '\\n')
+        stream.flush()
+'''
+
+
+@pytest.fixture
+def stand_in(tmp_path):
+    socket_path = str(tmp_path / 'scribus.sock')
+
+    # Run in its own process group (like Scribus, see `Worker.start`)
+    process = subprocess.Popen([sys.executable, '-c', STAND_IN, socket_path], start_new_session=True)
+
+    while not os.path.exists(socket_path):
+        time.sleep(0.05)
+
+    yield socket_path, process
+
+    if process.poll() is None:
+        process.kill()
+
+
+def test_hung_worker_is_restarted(stand_in, monkeypatch):
+    socket_path, process = stand_in
+
+    starts = []
+    monkeypatch.setattr(Worker, 'start', lambda worker: starts.append(worker.socket_path))
+
+    worker = Worker(socket_path, command_timeout=0.5)
+
+    with worker.session() as session:
+        with pytest.raises(WorkerTimeout):
+            session.exportPDF('final.pdf', None)
+
+    assert process.wait(5) == -signal.SIGKILL
+    assert starts == [socket_path]
@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.server import Archive
+
+
+def write_issue(issues_dir, name: str, contents: str):
+    os.makedirs(issues_dir / name, exist_ok=True)
+
+    with open(issues_dir / name / 'data.json', 'w') as file:
+        file.write(contents)
+
+
+def test_broken_issue_keeps_previous_responses(tmp_path):
+    data = {'Bilderbuch': [{'isbn': '978-3-423-62738-2', 'title': 'Sasja'}]}
+    write_issue(tmp_path, '2021_02', json.dumps(data))
+
+    archive = Archive(str(tmp_path))
+    assert archive.reload() == ['2021_02']
+
+    response = archive.get('/issues/2021_02')
+
+    # Half-written file neither raises nor replaces responses ..
+    write_issue(tmp_path, '2021_02', json.dumps(data)[:20])
+
+    assert archive.reload() == []
+    assert archive.get('/issues/2021_02') is response
+
+    # .. being picked up once it's complete again
+    data['Bilderbuch'][0]['title'] = 'Sasja & Co.'
+    write_issue(tmp_path, '2021_02', json.dumps(data))
+
+    assert archive.reload() == ['2021_02']
+    assert b'Sasja & Co.' in archive.get('/issues/2021_02').body
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+from doit.doit_cmd import reset_vars
+from doit.loader import load_tasks
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, ROOT)
+
+# Use defaults for command line variables (see `get_var`)
+reset_vars()
+
+import dodo
+
+# Phase two tasks (see `task_phase_two`)
+PHASE_TWO = ['process_data', 'create_template', 'generate_partials', 'import_partials', 'prepare_editing']
+
+# Phase three tasks, reading edited template (see `task_phase_three`)
+PHASE_THREE = ['build_pdf', 'preflight', 'preview', 'extract_excerpts', 'reconcile_data', 'finish_issue', 'export_data']
+
+
+@pytest.fixture
+def tasks(tmp_path, monkeypatch):
+    # Set up issue with some categories (as being left behind by phase one)
+    issue_dir = tmp_path / 'issues' / '2021_02'
+
+    for directory in ['src/csv', 'src/json', 'dist/csv', 'dist/templates', 'config']:
+        os.makedirs(issue_dir / directory)
+
+    for category in ['toddler', 'ab6', 'kalender']:
+        for path in ['src/csv/%s.csv', 'src/json/%s.json', 'dist/csv/%s.csv']:
+            (issue_dir / (path % category)).write_text('')
+
+    for path in ['config/age-ratings.json', 'config/duplicates.json', 'dist/templates/edited.sla']:
+        (issue_dir / path).write_text('')
+
+    os.symlink(os.path.join(ROOT, 'assets'), tmp_path / 'assets')
+    monkeypatch.chdir(tmp_path)
+
+    return load_tasks(dict(vars(dodo)))
+
+
+def in_phase(task, phase: list) -> bool:
+    return task.name.split(':')[0] in phase
+
+
+def get_producers(tasks) -> dict:
+    producers = {}
+
+    for task in tasks:
+        for target in task.targets:
+            producers.setdefault(target, []).append(task.name)
+
+    return producers
+
+
+def test_phase_two_targets_are_disjoint(tasks):
+    producers = get_producers(task for task in tasks if in_phase(task, PHASE_TWO))
+
+    assert {target: names for target, names in producers.items() if len(names) > 1} == {}
+
+
+def test_phase_two_leaves_inputs_untouched(tasks):
+    for task in tasks:
+        if in_phase(task, PHASE_TWO):
+            assert set(task.file_dep) & set(task.targets) == set(), task.name
+
+
+def test_phase_two_inputs_exist_or_are_built(tasks):
+    producers = get_producers(tasks)
+
+    for task in tasks:
+        if in_phase(task, PHASE_TWO):
+            missing = [path for path in task.file_dep if not os.path.exists(path) and path not in producers]
+
+            assert missing == [], task.name
+
+
+def test_phase_three_skips_phase_two(tasks):
+    # Edited template is changed by hand, so no task may (re)build it ..
+    edited_template = os.path.join('issues', '2021_02', 'dist', 'templates', 'edited.sla')
+
+    assert edited_template not in get_producers(tasks)
+
+    # .. nor may later tasks depend on phase two otherwise
+    for task in tasks:
+        if in_phase(task, PHASE_THREE):
+            assert [name for name in task.task_dep if in_phase(dodo_task(tasks, name), PHASE_TWO)] == [], task.name
+
+
+def dodo_task(tasks, name: str):
+    return next(task for task in tasks if task.name == name)